@@ -0,0 +1,168 @@
+# armazenamento.py
+"""Base local (arquivos Parquet) com os clientes e as vendas do dashboard."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from dados import COLUNAS_CLIENTES, gerar_dados_ficticios_corrigidos
+
+DIRETORIO_BASE = Path(os.environ.get("DASHBOARD_BASE_DIR", Path(__file__).resolve().parent / "base_dados"))
+N_VENDAS_INICIAL = int(os.environ.get("DASHBOARD_N_VENDAS", 200))
+MAX_PARTES_CLIENTES = 64  # acima disso as partes de clientes são compactadas num único arquivo
+TENTATIVAS_LEITURA = 5  # releituras do manifesto quando uma parte some durante a leitura (compactação concorrente)
+
+_trava_manifesto = threading.Lock()
+
+TIPOS_CLIENTES = {'Cliente': 'string', 'Cidade': 'string', 'Latitude': 'float64', 'Longitude': 'float64', 'CNPJ': 'string', 'Contribuinte': 'string'}
+
+
+def _arquivo_vendas(diretorio):
+    return Path(diretorio) / "vendas.parquet"
+
+
+def _pasta_clientes(diretorio):
+    return Path(diretorio) / "clientes"
+
+
+def _arquivo_manifesto(diretorio):
+    return _pasta_clientes(diretorio) / "manifesto.json"
+
+
+def _partes_clientes(diretorio):
+    """
+    Partes de clientes em uso, na ordem em que foram gravadas.
+
+    A lista vem do manifesto, que é trocado atomicamente a cada gravação; bases
+    antigas, sem manifesto, usam todos os Parquet da pasta.
+    """
+    pasta = _pasta_clientes(diretorio)
+    try:
+        nomes = json.loads(_arquivo_manifesto(diretorio).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        if not pasta.exists():
+            return []
+        return sorted(p for p in pasta.iterdir() if p.suffix == ".parquet" and not p.name.startswith("."))
+    return [pasta / nome for nome in nomes]
+
+
+def _gravar_manifesto(partes, diretorio):
+    destino = _arquivo_manifesto(diretorio)
+    temporario = destino.with_name(f".{destino.name}.{uuid.uuid4().hex}.tmp")
+    temporario.write_text(json.dumps([p.name for p in partes]), encoding='utf-8')
+    os.replace(temporario, destino)
+
+
+def _gravar_atomico(df, destino):
+    """Grava o Parquet num arquivo oculto e o renomeia, para leitores nunca verem arquivos pela metade."""
+    destino = Path(destino)
+    temporario = destino.with_name(f".{destino.name}.{uuid.uuid4().hex}.tmp")
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, destino)
+
+
+def _nova_parte(diretorio):
+    return _pasta_clientes(diretorio) / f"parte-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _normalizar_clientes(df):
+    return df[COLUNAS_CLIENTES].astype(TIPOS_CLIENTES)
+
+
+def inicializar_base(diretorio=DIRETORIO_BASE, n_vendas=N_VENDAS_INICIAL, seed=None):
+    """
+    Cria a base com dados fictícios caso ela ainda não exista.
+
+    A verificação e a criação acontecem sob a trava do manifesto, para que
+    sessões abertas ao mesmo tempo numa base vazia não a criem duas vezes.
+    """
+    diretorio = Path(diretorio)
+    if _arquivo_vendas(diretorio).exists() and _arquivo_manifesto(diretorio).exists():
+        return
+    with _trava_manifesto:
+        _pasta_clientes(diretorio).mkdir(parents=True, exist_ok=True)
+        if _arquivo_vendas(diretorio).exists() and _partes_clientes(diretorio):
+            if not _arquivo_manifesto(diretorio).exists():
+                _gravar_manifesto(_partes_clientes(diretorio), diretorio)
+            return
+        df_clientes, df_vendas = gerar_dados_ficticios_corrigidos(n_vendas=n_vendas, seed=seed)
+        parte = _nova_parte(diretorio)
+        _gravar_atomico(_normalizar_clientes(df_clientes), parte)
+        _gravar_manifesto([parte], diretorio)
+        # As vendas são gravadas em ordem de data para os filtros por período não precisarem reordenar.
+        _gravar_atomico(df_vendas.sort_values('Data_Venda', kind='stable', ignore_index=True), _arquivo_vendas(diretorio))
+
+
+def versao_vendas(diretorio=DIRETORIO_BASE):
+    """Identificador barato da versão atual das vendas, para usar como chave de cache."""
+    arquivo = _arquivo_vendas(diretorio)
+    return arquivo.stat().st_mtime_ns if arquivo.exists() else 0
+
+
+def versao_clientes(diretorio=DIRETORIO_BASE):
+    """Identificador barato da versão atual dos clientes, para usar como chave de cache."""
+    return tuple(p.name for p in _partes_clientes(diretorio))
+
+
+def carregar_vendas(diretorio=DIRETORIO_BASE):
+    """Lê a tabela de vendas."""
+    return pd.read_parquet(_arquivo_vendas(diretorio))
+
+
+def carregar_clientes(diretorio=DIRETORIO_BASE):
+    """
+    Lê todas as partes da tabela de clientes numa única tabela.
+
+    Se uma compactação apagar uma parte no meio da leitura, o manifesto (já
+    trocado pela compactação) é relido e a leitura recomeça.
+    """
+    for tentativa in range(TENTATIVAS_LEITURA):
+        partes = _partes_clientes(diretorio)
+        if not partes:
+            return _normalizar_clientes(pd.DataFrame(columns=COLUNAS_CLIENTES))
+        try:
+            return pd.concat([pd.read_parquet(p) for p in partes], ignore_index=True)
+        except FileNotFoundError:
+            if tentativa == TENTATIVAS_LEITURA - 1:
+                raise
+
+
+def adicionar_clientes(df_novos, diretorio=DIRETORIO_BASE):
+    """
+    Persiste novos clientes como uma nova parte, sem regravar a tabela existente.
+
+    A parte só passa a ser lida depois que o manifesto é trocado. Quando o
+    número de partes passa de `MAX_PARTES_CLIENTES`, elas são compactadas
+    num único arquivo.
+    """
+    _pasta_clientes(diretorio).mkdir(parents=True, exist_ok=True)
+    parte = _nova_parte(diretorio)
+    _gravar_atomico(_normalizar_clientes(df_novos), parte)
+    with _trava_manifesto:
+        partes = _partes_clientes(diretorio) + [parte]
+        _gravar_manifesto(partes, diretorio)
+    if len(partes) > MAX_PARTES_CLIENTES:
+        compactar_clientes(diretorio)
+
+
+def compactar_clientes(diretorio=DIRETORIO_BASE):
+    """
+    Junta todas as partes de clientes num único arquivo.
+
+    O manifesto passa a apontar só para o arquivo compactado antes de as
+    partes antigas serem apagadas; quem ainda as estiver lendo relê o manifesto.
+    """
+    with _trava_manifesto:
+        partes = _partes_clientes(diretorio)
+        if len(partes) <= 1:
+            return
+        compactada = _nova_parte(diretorio)
+        _gravar_atomico(pd.concat([pd.read_parquet(p) for p in partes], ignore_index=True), compactada)
+        _gravar_manifesto([compactada], diretorio)
+    for parte in partes:
+        parte.unlink(missing_ok=True)
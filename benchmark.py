@@ -0,0 +1,238 @@
+# benchmark.py
+"""
+Benchmark das rotinas de dados do dashboard, sem Streamlit e sem acesso à rede.
+
+Mede tempo (melhor de N repetições) e pico de memória (tracemalloc) de cada etapa
+para vários tamanhos de base e grava o resultado em JSON para comparar execuções:
+
+    python benchmark.py --tamanhos 10000 100000 1000000 10000000
+    python benchmark.py --comparar resultados_benchmark/<anterior>.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import types
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import corte
+import cubo
+import filtros
+import importacao
+import mapa
+from dados import gerar_cnpj, gerar_dados_ficticios_corrigidos
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados_benchmark"
+PECAS_LOTE_IA = 200
+
+
+class ClienteGroqFalso:
+    """Imita `client.chat.completions.create` do Groq com latência configurável e resposta fixa."""
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, messages, model, timeout=None):
+        if self.latencia:
+            time.sleep(self.latencia)
+        conteudo = "Análise simulada. Custo de máquina: R$ 12.30\nPREÇO UNITÁRIO ESTIMADO: R$ 42.00"
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=conteudo))])
+
+
+def medir(funcao, repeticoes):
+    """Executa `funcao` e retorna (resultado, melhor tempo em ms, pico de memória em MB)."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        gc.collect()
+        t0 = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return resultado, min(tempos), pico
+
+
+def gerar_pecas(rng, n_pecas):
+    """Lista de peças de corte aleatória no formato de `corte.COLUNAS_PECAS`."""
+    return pd.DataFrame({
+        'Material': np.array(list(corte.TABELAS_CORTE), dtype=object)[rng.integers(0, len(corte.TABELAS_CORTE), n_pecas)],
+        'Espessura (mm)': rng.uniform(0.5, 50.8, n_pecas).round(1),
+        'Comprimento de Corte (mm)': rng.integers(100, 5000, n_pecas),
+        'Furos': rng.integers(1, 20, n_pecas),
+        'Quantidade': rng.integers(1, 50, n_pecas),
+    })
+
+
+def etapas(n_vendas, seed):
+    """Gera as etapas (nome, função) na ordem em que o dashboard as executa; cada etapa usa o resultado das anteriores."""
+    estado = {}
+    rng = np.random.default_rng(seed)
+    # entradas que não fazem parte das etapas medidas são sorteadas antes
+    pecas = gerar_pecas(rng, n_vendas)
+    n_clientes_mapa = max(n_vendas // 100, 10)
+    clientes_mapa = pd.DataFrame({
+        'Cliente': [f"Cliente {i}" for i in range(n_clientes_mapa)],
+        'Latitude': rng.uniform(-33, 5, n_clientes_mapa),
+        'Longitude': rng.uniform(-73, -35, n_clientes_mapa),
+    })
+    cidades = importacao.tabela_cidades()
+    n_importados = max(n_vendas // 100, 10)
+    clientes_importados = pd.DataFrame({
+        'Cliente': [f"Empresa {i}" for i in range(n_importados)],
+        'Cidade': (cidades['Cidade'] + ', ' + cidades['UF']).to_numpy()[rng.integers(0, len(cidades), n_importados)],
+        'Latitude': np.nan,
+        'Longitude': np.nan,
+        'CNPJ': [gerar_cnpj(rng) for _ in range(n_importados)],
+        'Contribuinte': 'Sim',
+    })
+    prospects_mapa = tuple((f"Prospect {i}", "", -23.0 + i / 100, -47.0) for i in range(10))
+
+    def geracao():
+        estado['clientes'], estado['vendas'] = gerar_dados_ficticios_corrigidos(n_vendas=n_vendas, seed=seed)
+        return estado['vendas']
+
+    def motor_filtros():
+        estado['motor'] = filtros.MotorFiltros(estado['vendas'])
+        return estado['motor']
+
+    def construir_cubo():
+        estado['cubo'] = cubo.construir_cubo(estado['motor'].vendas)
+        return estado['cubo']
+
+    def filtro_ano_mes_cliente():
+        motor = estado['motor']
+        motor.limpar_cache()
+        ano = motor.anos[-1]
+        clientes = estado['clientes']['Cliente'].tolist()[:3]
+        estado['filtradas'] = motor.filtrar(ano=ano, mes=1, clientes=clientes)
+        return len(estado['filtradas'].faturadas)
+
+    def filtro_bruto_referencia():
+        # caminho original do dashboard (.dt.year/.dt.month + isin), mantido como referência
+        vendas = estado['vendas']
+        ano = estado['motor'].anos[-1]
+        clientes = estado['clientes']['Cliente'].tolist()[:3]
+        filtradas = vendas[(vendas['Data_Venda'].dt.year == ano) & (vendas['Data_Venda'].dt.month == 1)]
+        filtradas = filtradas[filtradas['Cliente'].isin(clientes)]
+        return len(filtradas[filtradas['Data_Faturamento'].notna()])
+
+    def kpis_cubo():
+        cubo_filtrado = cubo.filtrar_cubo(estado['cubo'], ano=estado['motor'].anos[-1])
+        return cubo.indicadores(cubo_filtrado)
+
+    def kpis_brutos_referencia():
+        # mesmo recorte de kpis_cubo (último ano), pelo caminho original
+        vendas = estado['vendas']
+        vendas = vendas[vendas['Data_Venda'].dt.year == estado['motor'].anos[-1]]
+        faturadas = vendas[vendas['Data_Faturamento'].notna()]
+        return faturadas['Valor (R$)'].sum(), vendas[vendas['Data_Carregamento'].notna()]['Valor (R$)'].sum(), faturadas['Quantidade (Ton)'].sum()
+
+    def faturado_por_mes():
+        return cubo.faturado_por_mes(estado['cubo'])
+
+    def toneladas_por_produto():
+        return cubo.toneladas_carregadas_por_produto(estado['cubo'])
+
+    def ultimas_faturadas():
+        motor = estado['motor']
+        motor.limpar_cache()
+        return motor.filtrar().ultimas_faturadas(5)
+
+    def ultima_venda_por_cliente():
+        motor = estado['motor']
+        motor.limpar_cache()
+        return filtros.tabela_clientes(estado['clientes'], motor.filtrar().resumo_clientes)
+
+    def coordenadas_mapa():
+        return mapa.preparar_pontos(clientes_mapa, prospects_mapa)
+
+    def importacao_clientes():
+        return importacao.preparar_importacao(clientes_importados, estado['clientes'])
+
+    def corte_local():
+        return corte.preco_unitario(pecas['Material'].to_numpy(), pecas['Espessura (mm)'].to_numpy(), pecas['Comprimento de Corte (mm)'].to_numpy(), pecas['Furos'].to_numpy())
+
+    def lote_ia_stub():
+        return list(corte.orcar_lote(ClienteGroqFalso(), pecas.head(PECAS_LOTE_IA), max_workers=8, requisicoes_por_minuto=None))
+
+    return [
+        ('geracao', geracao),
+        ('motor_filtros', motor_filtros),
+        ('construir_cubo', construir_cubo),
+        ('filtro_ano_mes_cliente', filtro_ano_mes_cliente),
+        ('filtro_bruto_referencia', filtro_bruto_referencia),
+        ('kpis_cubo', kpis_cubo),
+        ('kpis_brutos_referencia', kpis_brutos_referencia),
+        ('faturado_por_mes', faturado_por_mes),
+        ('toneladas_por_produto', toneladas_por_produto),
+        ('ultimas_faturadas', ultimas_faturadas),
+        ('ultima_venda_por_cliente', ultima_venda_por_cliente),
+        ('coordenadas_mapa', coordenadas_mapa),
+        ('importacao_clientes', importacao_clientes),
+        ('corte_local', corte_local),
+        ('lote_ia_stub', lote_ia_stub),
+    ]
+
+
+def executar(tamanhos, repeticoes, seed):
+    resultados = []
+    for n_vendas in tamanhos:
+        for nome, funcao in etapas(n_vendas, seed):
+            _, tempo_ms, pico_mb = medir(funcao, repeticoes)
+            resultados.append({'tamanho': n_vendas, 'etapa': nome, 'tempo_ms': round(tempo_ms, 3), 'pico_memoria_mb': round(pico_mb, 3)})
+            print(f"{n_vendas:>11,} {nome:<26} {tempo_ms:>11.2f} ms {pico_mb:>10.1f} MB", flush=True)
+    return resultados
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atuais, arquivo_anterior):
+    """Imprime a razão entre os tempos atuais e os de uma execução anterior (>1 = mais lento agora)."""
+    anteriores = {(r['tamanho'], r['etapa']): r for r in json.loads(Path(arquivo_anterior).read_text(encoding='utf-8'))['resultados']}
+    print(f"\nComparação com {arquivo_anterior}:")
+    for r in atuais:
+        anterior = anteriores.get((r['tamanho'], r['etapa']))
+        if anterior and anterior['tempo_ms'] > 0:
+            print(f"{r['tamanho']:>11,} {r['etapa']:<26} {r['tempo_ms'] / anterior['tempo_ms']:>6.2f}x tempo  {r['pico_memoria_mb'] - anterior['pico_memoria_mb']:>+9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO, help="quantidades de vendas a testar")
+    parser.add_argument('--repeticoes', type=int, default=3, help="repetições por etapa (vale o melhor tempo)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', type=Path, default=None, help="arquivo JSON de saída (padrão: resultados_benchmark/<data>.json)")
+    parser.add_argument('--comparar', type=Path, default=None, help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    resultados = executar(args.tamanhos, args.repeticoes, args.seed)
+    saida = args.saida or PASTA_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    metadados = {'data': datetime.now().isoformat(timespec='seconds'), 'commit': _commit_atual(), 'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__, 'maquina': platform.platform(), 'repeticoes': args.repeticoes, 'seed': args.seed}
+    saida.write_text(json.dumps({'metadados': metadados, 'resultados': resultados}, indent=2), encoding='utf-8')
+    print(f"\nResultados gravados em {saida}")
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
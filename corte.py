@@ -0,0 +1,217 @@
+# corte.py
+"""Orçamento de serviços de corte: modelo de custo local, leitura de listas de peças e orçamento em lote via IA."""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import ia
+import planilhas
+
+TIMEOUT_CONSULTA = 60.0  # segundos por consulta à IA no orçamento em lote; evita que uma requisição travada prenda uma thread
+COLUNAS_PECAS = ['Material', 'Espessura (mm)', 'Comprimento de Corte (mm)', 'Furos', 'Quantidade']
+COLUNAS_CHAPA = ['Largura (mm)', 'Altura (mm)']  # opcionais: retângulo de chapa consumido pela peça; 0 quando o material é do cliente
+# -----------------------------------------------------------------------------
+# Modelo de custo local
+# -----------------------------------------------------------------------------
+# Velocidade de corte (mm/min) e tempo de perfuração (s) por espessura (mm), interpolados
+# linearmente entre os pontos; densidade em g/cm³ e preço do material em R$/kg.
+TABELAS_CORTE = {
+    'Aço Carbono A36': {
+        'espessuras': [1.0, 3.0, 6.0, 10.0, 12.7, 20.0, 25.4, 38.0, 50.8],
+        'velocidades': [8000, 5000, 3200, 2200, 1700, 1000, 700, 350, 200],
+        'perfuracao_s': [0.2, 0.4, 0.7, 1.0, 1.3, 2.0, 2.8, 4.5, 6.0],
+        'densidade': 7.85, 'preco_kg': 7.50,
+    },
+    'Aço Inoxidável 304': {
+        'espessuras': [1.0, 3.0, 6.0, 10.0, 12.7, 20.0, 25.4, 38.0, 50.8],
+        'velocidades': [6500, 3800, 2400, 1500, 1150, 650, 450, 220, 120],
+        'perfuracao_s': [0.3, 0.5, 0.9, 1.4, 1.8, 2.8, 3.8, 6.0, 8.0],
+        'densidade': 7.93, 'preco_kg': 28.00,
+    },
+    'Alumínio Naval 5052': {
+        'espessuras': [1.0, 3.0, 6.0, 10.0, 12.7, 20.0, 25.4, 38.0, 50.8],
+        'velocidades': [9500, 6200, 4000, 2700, 2100, 1300, 900, 480, 280],
+        'perfuracao_s': [0.2, 0.3, 0.6, 0.9, 1.2, 1.8, 2.5, 4.0, 5.5],
+        'densidade': 2.68, 'preco_kg': 32.00,
+    },
+}
+TAXA_HORA_MAQUINA = 350.0  # R$/h, inclui operador, energia e gases
+CONSUMIVEIS_POR_METRO = 1.20  # R$ por metro de corte (bicos, eletrodos) em chapa de 10 mm; proporcional à espessura
+MARGEM = 0.30
+
+
+def calcular_custos(material, espessura, comprimento, furos, area_mm2=0.0, taxa_hora=TAXA_HORA_MAQUINA, margem=MARGEM):
+    """
+    Calcula o custo de corte de uma peça ou de arrays de peças, sem chamar a IA.
+
+    Aceita escalares ou arrays (NumPy/pandas) do mesmo tamanho. `area_mm2` é a
+    área da chapa consumida pela peça; deixe 0 quando o material é fornecido pelo
+    cliente. Materiais fora de `TABELAS_CORTE` resultam em NaN. Retorna um
+    dicionário com tempo de máquina (min), custo de máquina, consumíveis,
+    material e o preço unitário final (R$).
+    """
+    material = np.asarray(material, dtype=object)
+    espessura, comprimento, furos, area_mm2 = (np.asarray(v, dtype=float) for v in (espessura, comprimento, furos, area_mm2))
+    forma = np.broadcast(material, espessura, comprimento, furos, area_mm2).shape
+    velocidade = np.full(forma, np.nan)
+    perfuracao_s = np.full(forma, np.nan)
+    densidade = np.full(forma, np.nan)
+    preco_kg = np.full(forma, np.nan)
+    material_b, espessura_b = np.broadcast_to(material, forma), np.broadcast_to(espessura, forma)
+    for nome, tabela in TABELAS_CORTE.items():
+        mascara = material_b == nome
+        if not mascara.any():
+            continue
+        velocidade[mascara] = np.interp(espessura_b[mascara], tabela['espessuras'], tabela['velocidades'])
+        perfuracao_s[mascara] = np.interp(espessura_b[mascara], tabela['espessuras'], tabela['perfuracao_s'])
+        densidade[mascara] = tabela['densidade']
+        preco_kg[mascara] = tabela['preco_kg']
+
+    tempo_min = comprimento / velocidade + furos * perfuracao_s / 60
+    custo_maquina = tempo_min / 60 * taxa_hora
+    custo_consumiveis = comprimento / 1000 * CONSUMIVEIS_POR_METRO * np.maximum(espessura, 1.0) / 10
+    custo_material = area_mm2 * espessura * densidade * 1e-6 * preco_kg
+    preco_unitario = np.round((custo_maquina + custo_consumiveis + custo_material) * (1 + margem), 2)
+    custos = {'tempo_min': tempo_min, 'custo_maquina': custo_maquina, 'custo_consumiveis': custo_consumiveis, 'custo_material': custo_material, 'preco_unitario': preco_unitario}
+    return {k: (v.item() if v.ndim == 0 else v) for k, v in custos.items()}
+
+
+def preco_unitario(material, espessura, comprimento, furos, area_mm2=0.0, **kwargs):
+    """Atalho para o preço unitário (R$) de `calcular_custos`."""
+    return calcular_custos(material, espessura, comprimento, furos, area_mm2, **kwargs)['preco_unitario']
+
+
+def area_chapa(pecas):
+    """Área de chapa (mm²) de cada peça a partir de `COLUNAS_CHAPA`; 0 quando as colunas não existem."""
+    if not set(COLUNAS_CHAPA).issubset(pecas.columns):
+        return np.zeros(len(pecas))
+    return (pecas['Largura (mm)'] * pecas['Altura (mm)']).to_numpy(dtype=float)
+
+
+def orcar_lote_local(pecas):
+    """Orça toda a lista de peças com o modelo local (vetorizado), acrescentando preço unitário e total."""
+    orcamento = pecas.copy()
+    orcamento['Preço Unitário (R$)'] = preco_unitario(pecas['Material'].to_numpy(), pecas['Espessura (mm)'].to_numpy(), pecas['Comprimento de Corte (mm)'].to_numpy(), pecas['Furos'].to_numpy(), area_chapa(pecas))
+    orcamento['Total (R$)'] = orcamento['Preço Unitário (R$)'] * orcamento['Quantidade']
+    orcamento['Status'] = np.where(orcamento['Preço Unitário (R$)'].notna(), 'OK', 'Material sem tabela de corte')
+    return orcamento
+
+
+# -----------------------------------------------------------------------------
+# Listas de peças e orçamento em lote via IA
+# -----------------------------------------------------------------------------
+# Nomes aceitos no arquivo (sem acentos, minúsculos) para cada coluna da lista de peças
+ALIASES_COLUNAS = {
+    'material': 'Material',
+    'espessura': 'Espessura (mm)', 'espessura (mm)': 'Espessura (mm)',
+    'comprimento': 'Comprimento de Corte (mm)', 'comprimento de corte': 'Comprimento de Corte (mm)', 'comprimento de corte (mm)': 'Comprimento de Corte (mm)',
+    'furos': 'Furos', 'inicios': 'Furos', 'furos / inicios': 'Furos', 'perfuracoes': 'Furos',
+    'quantidade': 'Quantidade', 'qtd': 'Quantidade', 'quantidade de pecas': 'Quantidade',
+    'largura': 'Largura (mm)', 'largura (mm)': 'Largura (mm)', 'largura da chapa': 'Largura (mm)',
+    'altura': 'Altura (mm)', 'altura (mm)': 'Altura (mm)', 'altura da chapa': 'Altura (mm)',
+}
+
+
+def ler_lista_pecas(arquivo, nome=None):
+    """
+    Lê uma lista de peças em CSV ou Excel e devolve um DataFrame com `COLUNAS_PECAS` e `COLUNAS_CHAPA`.
+
+    `arquivo` pode ser um caminho ou um objeto de arquivo (ex.: o retorno do
+    `st.file_uploader`); o formato é deduzido pela extensão de `nome`. Linhas com
+    valores numéricos inválidos são descartadas; colunas obrigatórias ausentes
+    geram `ValueError`. As medidas da chapa são opcionais: ausentes, vazias ou
+    negativas viram 0 (sem custo de material).
+    """
+    df = planilhas.ler_planilha(arquivo, ALIASES_COLUNAS, nome)
+    faltando = [c for c in COLUNAS_PECAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    for coluna in COLUNAS_CHAPA:
+        if coluna not in df.columns:
+            df[coluna] = 0
+    df = df[COLUNAS_PECAS + COLUNAS_CHAPA].copy()
+    for coluna in COLUNAS_PECAS[1:] + COLUNAS_CHAPA:
+        df[coluna] = pd.to_numeric(df[coluna].astype(str).str.replace(',', '.'), errors='coerce')
+    df[COLUNAS_CHAPA] = df[COLUNAS_CHAPA].fillna(0).clip(lower=0)
+    df['Material'] = df['Material'].astype(str).str.strip()
+    validas = df[COLUNAS_PECAS[1:]].notna().all(axis=1) & (df[COLUNAS_PECAS[1:]] > 0).all(axis=1)
+    df = df[validas].astype({'Furos': int, 'Quantidade': int, 'Comprimento de Corte (mm)': int})
+    return df.reset_index(drop=True)
+
+
+class LimitadorTaxa:
+    """Limita o número de requisições por minuto compartilhado entre as threads do lote."""
+
+    def __init__(self, requisicoes_por_minuto):
+        self.intervalo = 60.0 / requisicoes_por_minuto if requisicoes_por_minuto else 0.0
+        self._proxima = 0.0
+        self._trava = threading.Lock()
+
+    def aguardar(self):
+        with self._trava:
+            agora = time.monotonic()
+            espera = max(0.0, self._proxima - agora)
+            self._proxima = max(agora, self._proxima) + self.intervalo
+        if espera:
+            time.sleep(espera)
+
+
+def _erro_temporario(erro):
+    """Erros que valem nova tentativa: limite de taxa (429), falhas 5xx, timeout e conexão."""
+    status = getattr(erro, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(erro).__name__ in ('RateLimitError', 'APITimeoutError', 'APIConnectionError', 'TimeoutError', 'ConnectionError')
+
+
+def orcar_peca(client, material, espessura, comprimento, furos, cache=None, limitador=None, tentativas=4, espera_inicial=1.0, timeout=TIMEOUT_CONSULTA):
+    """
+    Orça uma peça via IA com novas tentativas (backoff exponencial) em erros temporários; retorna (preço, resposta).
+
+    O `limitador` só segura as consultas que vão à API: respostas já guardadas
+    no `cache` voltam na hora.
+    """
+    parametros = {'material': material, 'espessura': espessura, 'comprimento': comprimento, 'furos': furos}
+    prompt = ia.prompt_corte(material, espessura, comprimento, furos)
+    for tentativa in range(tentativas):
+        try:
+            resposta = ia.perguntar(client, prompt, 'corte', parametros, cache=cache, timeout=timeout, limitador=limitador)
+            return ia.extrair_preco_unitario(resposta), resposta
+        except Exception as erro:
+            if tentativa == tentativas - 1 or not _erro_temporario(erro):
+                raise
+            time.sleep(espera_inicial * 2 ** tentativa * (1 + random.random()))
+
+
+def orcar_lote(client, pecas, max_workers=4, cache=None, requisicoes_por_minuto=30, **kwargs):
+    """
+    Orça uma lista de peças em paralelo, gerando um resultado por peça assim que ele fica pronto.
+
+    Peças com os mesmos parâmetros de corte compartilham uma única consulta à IA.
+    Cada resultado é um dicionário com as colunas da peça, o índice da linha
+    (`Linha`), `Preço Unitário (R$)`, `Total (R$)` e `Status`. Se quem consome
+    parar antes do fim, as peças ainda na fila são canceladas sem esperar.
+    """
+    limitador = LimitadorTaxa(requisicoes_por_minuto)
+    chaves = COLUNAS_PECAS[:4]
+    grupos = pecas.groupby(chaves, sort=False).groups
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futuros = {executor.submit(orcar_peca, client, *chave, cache=cache, limitador=limitador, **kwargs): linhas for chave, linhas in grupos.items()}
+        for futuro in as_completed(futuros):
+            try:
+                preco, _ = futuro.result()
+                status = 'OK' if preco is not None else 'Preço não encontrado na resposta'
+            except Exception as erro:
+                preco, status = None, f"Erro: {erro}"
+            for linha in futuros[futuro]:
+                peca = pecas.loc[linha]
+                total = preco * peca['Quantidade'] if preco is not None else None
+                yield {'Linha': linha, **peca.to_dict(), 'Preço Unitário (R$)': preco, 'Total (R$)': total, 'Status': status}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,85 @@
+# cubo.py
+"""
+Cubo de vendas pré-agregado usado pelos filtros da barra lateral e pelos indicadores da aba 1.
+
+O cubo é reconstruído inteiro a cada nova versão das vendas (ver `armazenamento.versao_vendas`).
+"""
+
+import pandas as pd
+
+DIMENSOES = ['Ano', 'Mes', 'Cliente', 'Produto', 'Mes_Faturamento', 'Carregada']
+MEDIDAS = ['Valor (R$)', 'Quantidade (Ton)', 'Vendas']
+SEM_FATURAMENTO = 0  # código de Mes_Faturamento para vendas ainda não faturadas
+
+
+def construir_cubo(df_vendas):
+    """
+    Agrega as vendas por (ano, mês, cliente, produto, mês de faturamento, carregada).
+
+    `Mes_Faturamento` é guardado como código inteiro AAAAMM (0 quando a venda
+    não foi faturada), o que mantém o agrupamento barato mesmo com milhões de linhas.
+    """
+    data_venda = df_vendas['Data_Venda'].dt
+    data_faturamento = df_vendas['Data_Faturamento'].dt
+    chaves = pd.DataFrame({
+        'Ano': data_venda.year.astype('int16'),
+        'Mes': data_venda.month.astype('int8'),
+        'Cliente': df_vendas['Cliente'],
+        'Produto': df_vendas['Produto'],
+        'Mes_Faturamento': (data_faturamento.year * 100 + data_faturamento.month).fillna(SEM_FATURAMENTO).astype('int32'),
+        'Carregada': df_vendas['Data_Carregamento'].notna().to_numpy(),
+        'Valor (R$)': df_vendas['Valor (R$)'],
+        'Quantidade (Ton)': df_vendas['Quantidade (Ton)'],
+        'Vendas': 1,
+    })
+    return _agregar(chaves)
+
+
+def _agregar(df):
+    return df.groupby(DIMENSOES, observed=True, sort=True)[MEDIDAS].sum().reset_index()
+
+
+def filtrar_cubo(cubo, ano=None, mes=None, clientes=None):
+    """Filtra o cubo por ano, mês da venda e clientes; `None` significa sem filtro."""
+    mascara = pd.Series(True, index=cubo.index)
+    if ano is not None:
+        mascara &= cubo['Ano'] == ano
+    if mes is not None:
+        mascara &= cubo['Mes'] == mes
+    if clientes is not None:
+        mascara &= cubo['Cliente'].isin(clientes)
+    return cubo[mascara]
+
+
+def anos_disponiveis(cubo):
+    """Anos com vendas, do mais recente para o mais antigo."""
+    return sorted(cubo['Ano'].unique().tolist(), reverse=True)
+
+
+def clientes_com_vendas(cubo):
+    """Clientes que aparecem no cubo (já filtrado)."""
+    return cubo['Cliente'].unique().tolist()
+
+
+def indicadores(cubo):
+    """Total faturado, total carregado e toneladas faturadas do cubo (já filtrado)."""
+    faturadas = cubo['Mes_Faturamento'] != SEM_FATURAMENTO
+    return {
+        'total_faturado': cubo.loc[faturadas, 'Valor (R$)'].sum(),
+        'total_carregado': cubo.loc[cubo['Carregada'], 'Valor (R$)'].sum(),
+        'toneladas_vendidas': cubo.loc[faturadas, 'Quantidade (Ton)'].sum(),
+    }
+
+
+def faturado_por_mes(cubo):
+    """Valor faturado por mês de faturamento, com o mês no formato 'AAAA-MM'."""
+    faturadas = cubo[cubo['Mes_Faturamento'] != SEM_FATURAMENTO]
+    por_mes = faturadas.groupby('Mes_Faturamento')['Valor (R$)'].sum().reset_index()
+    codigo = por_mes['Mes_Faturamento']
+    por_mes['Mes_Faturamento'] = (codigo // 100).astype(str) + '-' + (codigo % 100).astype(str).str.zfill(2)
+    return por_mes
+
+
+def toneladas_carregadas_por_produto(cubo):
+    """Toneladas carregadas por produto."""
+    return cubo[cubo['Carregada']].groupby('Produto', observed=True)['Quantidade (Ton)'].sum().reset_index()
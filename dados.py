@@ -0,0 +1,90 @@
+# dados.py
+"""Geração dos dados fictícios de clientes e vendas usados pelo dashboard."""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+PRODUTOS = ['Viga W', 'Viga I', 'Cantoneira L', 'Barra Chata', 'Tubo Quadrado', 'Tubo Redondo', 'Perfil U']
+CLIENTES_BASE = {
+    'Construtora Alfa': ('São Paulo', -23.5505, -46.6333, 'Sim'),
+    'Metalúrgica Beta': ('Rio de Janeiro', -22.9068, -43.1729, 'Sim'),
+    'Serralheria Gama': ('Belo Horizonte', -19.9167, -43.9345, 'Não'),
+    'Engenharia Delta': ('Curitiba', -25.4284, -49.2733, 'Sim'),
+    'Estruturas Épsilon': ('Porto Alegre', -30.0346, -51.2177, 'Sim'),
+}
+DATA_INICIO_VENDAS = pd.Timestamp('2024-01-01')
+COLUNAS_CLIENTES = ['Cliente', 'Cidade', 'Latitude', 'Longitude', 'CNPJ', 'Contribuinte']
+COLUNAS_VENDAS = ['ID_Venda', 'Data_Venda', 'Produto', 'Cliente', 'Quantidade (Ton)', 'Valor (R$)', 'Data_Faturamento', 'Data_Carregamento']
+
+
+PESOS_CNPJ_DV1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+PESOS_CNPJ_DV2 = (6,) + PESOS_CNPJ_DV1
+
+
+def digitos_verificadores_cnpj(base):
+    """Calcula os dois dígitos verificadores para os 12 primeiros dígitos de um CNPJ."""
+    digitos = [int(d) for d in base]
+    for pesos in (PESOS_CNPJ_DV1, PESOS_CNPJ_DV2):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return f"{digitos[-2]}{digitos[-1]}"
+
+
+def gerar_cnpj(rng=None):
+    """Gera um número de CNPJ fictício (com dígitos verificadores válidos) formatado."""
+    if rng is None:
+        a, b, c = random.randint(10, 99), random.randint(100, 999), random.randint(100, 999)
+    else:
+        a, b, c = rng.integers([10, 100, 100], [100, 1000, 1000])
+    return f"{a}.{b}.{c}/0001-{digitos_verificadores_cnpj(f'{a}{b}{c}0001')}"
+
+
+def gerar_clientes(rng=None):
+    """Monta a tabela de clientes fixos com CNPJs fictícios."""
+    linhas = [(nome, cidade, lat, lon, gerar_cnpj(rng), contrib) for nome, (cidade, lat, lon, contrib) in CLIENTES_BASE.items()]
+    return pd.DataFrame(linhas, columns=COLUNAS_CLIENTES)
+
+
+def gerar_vendas(clientes, n_vendas=200, seed=None, data_fim=None):
+    """
+    Gera `n_vendas` vendas fictícias de forma vetorizada.
+
+    Todas as colunas são sorteadas em lote com NumPy: ~90% das vendas são
+    faturadas 1 a 5 dias após a venda e, destas, ~80% são carregadas 1 a 10
+    dias após o faturamento. `Produto` e `Cliente` saem como categóricos.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    if data_fim is None:
+        data_fim = datetime.now() - timedelta(days=15)
+    n_dias = (pd.Timestamp(data_fim).normalize() - DATA_INICIO_VENDAS).days + 1
+    clientes = list(clientes)
+
+    um_dia = np.timedelta64(1, 'D')
+    data_venda = DATA_INICIO_VENDAS.to_datetime64() + rng.integers(0, n_dias, n_vendas) * um_dia
+    faturada = rng.random(n_vendas) < 0.9
+    carregada = faturada & (rng.random(n_vendas) < 0.8)
+    data_faturamento = data_venda + rng.integers(1, 6, n_vendas) * um_dia
+    data_carregamento = data_faturamento + rng.integers(1, 11, n_vendas) * um_dia
+    nat = np.datetime64('NaT', 'ns')
+
+    return pd.DataFrame({
+        'ID_Venda': np.arange(1000, 1000 + n_vendas, dtype=np.int64),
+        'Data_Venda': data_venda.astype('datetime64[ns]'),
+        'Produto': pd.Categorical.from_codes(rng.integers(0, len(PRODUTOS), n_vendas), categories=PRODUTOS),
+        'Cliente': pd.Categorical.from_codes(rng.integers(0, len(clientes), n_vendas), categories=clientes),
+        'Quantidade (Ton)': np.round(rng.uniform(1, 15, n_vendas), 2),
+        'Valor (R$)': np.round(rng.uniform(5000, 75000, n_vendas), 2),
+        'Data_Faturamento': np.where(faturada, data_faturamento, nat).astype('datetime64[ns]'),
+        'Data_Carregamento': np.where(carregada, data_carregamento, nat).astype('datetime64[ns]'),
+    })
+
+
+def gerar_dados_ficticios_corrigidos(n_vendas=200, seed=None):
+    """Gera dados com lógica de faturamento e carregamento realistas."""
+    rng = np.random.default_rng(seed)
+    df_clientes = gerar_clientes(rng)
+    df_vendas = gerar_vendas(df_clientes['Cliente'], n_vendas=n_vendas, seed=rng)
+    return df_clientes, df_vendas
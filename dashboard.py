@@ -2,14 +2,19 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
-import folium
-from streamlit_folium import st_folium
+from functools import partial
 from groq import Groq
-import random
-import re
-from datetime import datetime, timedelta
+import armazenamento
+import corte
+import cubo
+import filtros
+import instrumentacao
+import ia
+import importacao
+import mapa
+import tarefas
+from dados import gerar_cnpj
 
 # =============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA E ESTILO
@@ -47,10 +52,6 @@ st.markdown("""
 # =============================================================================
 # 2. FUNÇÕES, DADOS E INICIALIZAÇÃO
 # =============================================================================
-def gerar_cnpj():
-    """Gera um número de CNPJ fictício formatado."""
-    return f"{random.randint(10,99)}.{random.randint(100,999)}.{random.randint(100,999)}/0001-{random.randint(10,99)}"
-
 @st.cache_resource
 def get_groq_client():
     """Retorna um cliente Groq, usando cache."""
@@ -59,36 +60,120 @@ def get_groq_client():
     except Exception:
         return None
 
-def gerar_dados_ficticios_corrigidos():
-    """Gera dados com lógica de faturamento e carregamento realistas."""
-    clientes_data = {'Construtora Alfa': ('São Paulo', -23.5505, -46.6333, gerar_cnpj(), 'Sim'), 'Metalúrgica Beta': ('Rio de Janeiro', -22.9068, -43.1729, gerar_cnpj(), 'Sim'), 'Serralheria Gama': ('Belo Horizonte', -19.9167, -43.9345, gerar_cnpj(), 'Não'), 'Engenharia Delta': ('Curitiba', -25.4284, -49.2733, gerar_cnpj(), 'Sim'), 'Estruturas Épsilon': ('Porto Alegre', -30.0346, -51.2177, gerar_cnpj(), 'Sim')}
-    df_clientes = pd.DataFrame.from_dict(clientes_data, orient='index', columns=['Cidade', 'Latitude', 'Longitude', 'CNPJ', 'Contribuinte'])
-    df_clientes.index.name = 'Cliente'
-    df_clientes.reset_index(inplace=True)
-    
-    produtos = ['Viga W', 'Viga I', 'Cantoneira L', 'Barra Chata', 'Tubo Quadrado', 'Tubo Redondo', 'Perfil U']
-    vendas_data = []
-    lista_clientes_nomes = df_clientes['Cliente'].tolist()
-    
-    for i in range(200):
-        data_venda = pd.to_datetime(np.random.choice(pd.date_range(start='2024-01-01', end=datetime.now() - timedelta(days=15))))
-        data_faturamento, data_carregamento = None, None
-        if random.random() < 0.9:
-            data_faturamento = data_venda + timedelta(days=random.randint(1, 5))
-            if random.random() < 0.8:
-                data_carregamento = data_faturamento + timedelta(days=random.randint(1, 10))
-        
-        vendas_data.append({'ID_Venda': 1000 + i, 'Data_Venda': data_venda, 'Produto': random.choice(produtos), 'Cliente': random.choice(lista_clientes_nomes), 'Quantidade (Ton)': round(random.uniform(1, 15), 2), 'Valor (R$)': round(random.uniform(5000, 75000), 2), 'Data_Faturamento': data_faturamento, 'Data_Carregamento': data_carregamento})
-    df_vendas = pd.DataFrame(vendas_data)
-    return df_clientes, df_vendas
-
-# Inicialização do session_state
-if 'dados_carregados' not in st.session_state:
-    st.session_state.df_clientes, st.session_state.df_vendas = gerar_dados_ficticios_corrigidos()
-    st.session_state.dados_carregados = True
+@st.cache_resource(max_entries=1, show_spinner=False)
+def carregar_motor_filtros(versao):
+    """Carrega as vendas uma única vez por versão; a tabela (ordenada por data) é compartilhada, somente leitura, entre as sessões."""
+    return filtros.MotorFiltros(armazenamento.carregar_vendas())
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def carregar_clientes(versao):
+    """Carrega os clientes uma única vez por versão; a tabela é compartilhada (somente leitura) entre as sessões."""
+    return armazenamento.carregar_clientes()
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def carregar_cubo(versao):
+    """Monta o cubo de vendas pré-agregado uma única vez por versão das vendas."""
+    return cubo.construir_cubo(carregar_motor_filtros(versao).vendas)
+
+@st.cache_resource
+def get_perfilador():
+    """Perfilador compartilhado com as medições dos últimos reruns de todas as sessões."""
+    return instrumentacao.Perfilador()
+
+@st.cache_resource
+def get_cache_ia():
+    """Cache de respostas da IA compartilhado entre as sessões e gravado junto com a base."""
+    return ia.CacheRespostas(armazenamento.DIRETORIO_BASE / "cache_ia.sqlite")
+
+@st.cache_resource
+def get_executor_ia():
+    """Pool de threads compartilhado para as chamadas à IA de todas as sessões."""
+    return tarefas.ExecutorTarefas()
+
+@st.cache_resource
+def get_executor_lotes():
+    """Pool separado, e pequeno, para os orçamentos em lote: lotes longos não atrasam as demais consultas à IA."""
+    return tarefas.ExecutorTarefas(max_workers=tarefas.MAX_LOTES_SIMULTANEOS, nome='lote-ia')
+
+def enviar_consulta_ia(prompt, tipo, parametros, descricao=''):
+    """Envia uma consulta à IA em segundo plano e retorna a tarefa, sem bloquear o script."""
+    consulta = partial(ia.perguntar, client, prompt, tipo, parametros, cache=cache_ia, timeout=tarefas.TIMEOUT_PADRAO)
+    return executor_ia.enviar(perfilador.cronometrar(f"IA: {tipo}", consulta), descricao=descricao)
+
+def acompanhar_tarefas(chave, exibir):
+    """
+    Exibe as tarefas de IA `chave` da sessão num fragmento que se atualiza sozinho
+    enquanto alguma estiver em andamento; quando todas terminam, o app é recarregado uma vez.
+    """
+    if not st.session_state.tarefas_ia.get(chave):
+        return
+    em_andamento = any(t.em_andamento for t in st.session_state.tarefas_ia[chave].values())
+
+    def fragmento():
+        tarefas_chave = st.session_state.tarefas_ia.get(chave, {})
+        if em_andamento and not any(t.em_andamento for t in tarefas_chave.values()):
+            st.rerun()
+        exibir(tarefas_chave)
+
+    st.fragment(fragmento, run_every=INTERVALO_ATUALIZACAO_IA if em_andamento else None)()
+
+def mostrar_andamento(chave, tarefas_chave):
+    """Mostra as tarefas ainda em andamento e um botão para cancelá-las; retorna True se houver alguma."""
+    pendentes = {nome: t for nome, t in tarefas_chave.items() if t.em_andamento}
+    if not pendentes:
+        return False
+    for nome, tarefa in pendentes.items():
+        st.info(f"⏳ {tarefa.descricao or nome}: {tarefa.estado} há {tarefa.decorrido:.0f} s", icon="🤖")
+    if st.button("Cancelar", key=f"cancelar_{chave}"):
+        for tarefa in pendentes.values():
+            tarefa.cancelar()
+        st.rerun()
+    return True
+
+def consolidar_prospeccao():
+    """Quando todas as regiões pesquisadas terminam, junta os prospects encontrados e descarta as tarefas."""
+    tarefas_regioes = st.session_state.tarefas_ia.get('prospeccao')
+    if not tarefas_regioes or any(t.em_andamento for t in tarefas_regioes.values()):
+        return
+    prospects, avisos = [], []
+    for regiao, tarefa in tarefas_regioes.items():
+        if tarefa.erro() is not None:
+            avisos.append(f"{regiao}: {tarefa.erro()}")
+            continue
+        encontrados, descartados = importacao.validar_prospects(ia.extrair_prospects(tarefa.resultado()))
+        if descartados:
+            avisos.append(f"{regiao}: {descartados} prospect(s) descartado(s) por coordenadas inválidas.")
+        if not encontrados and not descartados:
+            avisos.append(f"{regiao}: não foi possível extrair os dados da resposta da IA.")
+        prospects.extend(encontrados)
+    st.session_state.prospects = prospects
+    st.session_state.avisos_prospeccao = avisos
+    del st.session_state.tarefas_ia['prospeccao']
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def renderizar_mapa(df_clientes_mapa, prospects):
+    """HTML do mapa, reaproveitado enquanto o conjunto de clientes e prospects não mudar."""
+    return mapa.mapa_html(df_clientes_mapa, prospects)
+
+# Inicialização da base compartilhada e do session_state
+perfilador = get_perfilador()
+rerun_perfil = perfilador.iniciar_rerun()
+with rerun_perfil.medir("Carregamento dos dados"):
+    armazenamento.inicializar_base()
+    versao_vendas = armazenamento.versao_vendas()
+    motor_filtros = carregar_motor_filtros(versao_vendas)
+    cubo_vendas = carregar_cubo(versao_vendas)
+    df_clientes = carregar_clientes(armazenamento.versao_clientes())
+if 'prospects' not in st.session_state:
     st.session_state.prospects = []
+if 'tarefas_ia' not in st.session_state:
+    st.session_state.tarefas_ia = {}
 
 client = get_groq_client()
+cache_ia = get_cache_ia()
+executor_ia = get_executor_ia()
+executor_lotes = get_executor_lotes()
+INTERVALO_ATUALIZACAO_IA = 1.0  # segundos entre as consultas ao estado das tarefas de IA
 perfis_lista = ['Viga W', 'Viga I', 'Cantoneira L', 'Barra Chata', 'Perfil U', 'Tubo Quadrado']
 telhas_lista = ['Telha Trapézio 25 (TR-25)', 'Telha Trapézio 40 (TR-40)', 'Telha Trapézio 100 (TR-100)']
 tipos_corte_material = ['Aço Carbono A36', 'Aço Inoxidável 304', 'Alumínio Naval 5052']
@@ -101,49 +186,43 @@ st.sidebar.image("https://i.imgur.com/7b2n3sC.png", width=150)
 st.sidebar.title("Filtros e Ferramentas")
 
 st.sidebar.subheader("Filtro de Período")
-anos_disponiveis = ["Todos"] + sorted(st.session_state.df_vendas['Data_Venda'].dt.year.unique(), reverse=True)
-ano_selecionado = st.sidebar.selectbox("Ano:", anos_disponiveis)
-meses_nomes = ["Todos", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-mes_selecionado_nome = st.sidebar.selectbox("Mês:", meses_nomes)
-
-df_vendas_filtrado_global = st.session_state.df_vendas.copy()
-if ano_selecionado != "Todos":
-    df_vendas_filtrado_global = df_vendas_filtrado_global[df_vendas_filtrado_global['Data_Venda'].dt.year == ano_selecionado]
-if mes_selecionado_nome != "Todos":
-    mes_num = meses_nomes.index(mes_selecionado_nome)
-    df_vendas_filtrado_global = df_vendas_filtrado_global[df_vendas_filtrado_global['Data_Venda'].dt.month == mes_num]
-
-st.sidebar.subheader("Filtro de Clientes")
-clientes_disponiveis_filtrados = df_vendas_filtrado_global['Cliente'].unique()
-clientes_selecionados = st.sidebar.multiselect("Selecione Clientes:", options=clientes_disponiveis_filtrados, default=list(clientes_disponiveis_filtrados))
-df_vendas_final = df_vendas_filtrado_global[df_vendas_filtrado_global['Cliente'].isin(clientes_selecionados)]
-df_clientes_final = st.session_state.df_clientes[st.session_state.df_clientes['Cliente'].isin(clientes_selecionados)]
+with rerun_perfil.medir("Filtros globais"):
+    anos_disponiveis = ["Todos"] + cubo.anos_disponiveis(cubo_vendas)
+    ano_selecionado = st.sidebar.selectbox("Ano:", anos_disponiveis)
+    meses_nomes = ["Todos", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+    mes_selecionado_nome = st.sidebar.selectbox("Mês:", meses_nomes)
+    ano_filtro = None if ano_selecionado == "Todos" else ano_selecionado
+    mes_filtro = None if mes_selecionado_nome == "Todos" else meses_nomes.index(mes_selecionado_nome)
+
+    st.sidebar.subheader("Filtro de Clientes")
+    cubo_periodo = cubo.filtrar_cubo(cubo_vendas, ano=ano_filtro, mes=mes_filtro)
+    clientes_disponiveis_filtrados = cubo.clientes_com_vendas(cubo_periodo)
+    clientes_selecionados = st.sidebar.multiselect("Selecione Clientes:", options=clientes_disponiveis_filtrados, default=list(clientes_disponiveis_filtrados))
+    # Com todos os clientes do período selecionados, o filtro de clientes é dispensado
+    clientes_filtro = None if len(clientes_selecionados) == len(clientes_disponiveis_filtrados) else clientes_selecionados
+    cubo_final = cubo.filtrar_cubo(cubo_periodo, clientes=clientes_filtro)
+    vendas_final = motor_filtros.filtrar(ano=ano_filtro, mes=mes_filtro, clientes=clientes_filtro)
+    df_clientes_final = df_clientes[df_clientes['Cliente'].isin(clientes_selecionados)]
 
 st.sidebar.markdown("---")
 
-with st.sidebar.expander("🤖 IA para Prospecção de Clientes", expanded=True):
-    localidade_pesquisa = st.text_input("Digite cidade/estado para prospecção:", "Campinas, SP")
+with st.sidebar.expander("🤖 IA para Prospecção de Clientes", expanded=True), rerun_perfil.medir("Prospecção (barra lateral)"):
+    localidade_pesquisa = st.text_input("Digite cidades/estados para prospecção (separe por ';'):", "Campinas, SP")
     if st.button("Buscar Novos Clientes", use_container_width=True):
         if not client:
             st.error("A chave da API da Groq não está configurada.")
         else:
-            with st.spinner("A IA está buscando..."):
-                prompt = f"""Atue como um assistente de vendas sênior para uma distribuidora de aço. Sua tarefa é encontrar 3 potenciais clientes reais na região de {localidade_pesquisa}. Foque em construtoras, metalúrgicas ou engenharias de estruturas. Para cada cliente, forneça: NOME, DESCRIÇÃO, LATITUDE e LONGITUDE. Retorne os dados estritamente no formato: - (NOME; DESCRIÇÃO; LATITUDE; LONGITUDE). Exemplo: - (Gerdau Aços Longos; Produz aço para construção civil; -23.55; -46.63)"""
-                try:
-                    chat_completion = client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model="llama3-8b-8192")
-                    response_text = chat_completion.choices[0].message.content
-                    st.session_state.prospects = []
-                    pattern = r'-\s*\((.*?);\s*(.*?);\s*(-?\d+\.?\d+);\s*(-?\d+\.?\d+)\)'
-                    matches = re.findall(pattern, response_text)
-                    if matches:
-                        for match in matches:
-                            st.session_state.prospects.append({"nome": match[0].strip(), "desc": match[1].strip(), "lat": float(match[2]), "lon": float(match[3])})
-                        st.success(f"{len(st.session_state.prospects)} prospects encontrados! Veja-os na aba 'Mapa Geográfico'.")
-                        st.rerun()
-                    else:
-                        st.warning("Não foi possível extrair os dados da resposta da IA.")
-                except Exception as e:
-                    st.error(f"Ocorreu um erro: {e}")
+            regioes = list(dict.fromkeys(r.strip() for r in localidade_pesquisa.split(';') if r.strip()))
+            st.session_state.tarefas_ia['prospeccao'] = {regiao: enviar_consulta_ia(ia.prompt_prospeccao(regiao), 'prospeccao', {'localidade': regiao}, descricao=f"Buscando em {regiao}") for regiao in regioes}
+    consolidar_prospeccao()
+    acompanhar_tarefas('prospeccao', partial(mostrar_andamento, 'prospeccao'))
+    if 'prospeccao' not in st.session_state.tarefas_ia:
+        for aviso in st.session_state.get('avisos_prospeccao', []):
+            st.warning(aviso)
+        if st.session_state.prospects:
+            st.success(f"{len(st.session_state.prospects)} prospects encontrados! Veja-os na aba 'Mapa Geográfico'.")
+    estatisticas_ia = cache_ia.estatisticas()
+    st.caption(f"Cache da IA: {estatisticas_ia['acertos']} acertos, {estatisticas_ia['falhas']} falhas ({estatisticas_ia['taxa_acerto']:.0%}).")
 
 # =============================================================================
 # 4. ESTRUTURA PRINCIPAL COM ABAS
@@ -152,36 +231,33 @@ st.title("🏗️ Dashboard de Vendas de Aço Estrutural")
 
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Visão Geral", "🗺️ Mapa Geográfico", "👥 Gestão de Clientes", "🏷️ Análise de Preços", "⚙️ Serviços de Corte"])
 
-with tab1:
+with tab1, rerun_perfil.medir("Aba 1 - Visão Geral"):
     st.header("Análise de Performance de Vendas e Logística")
     with st.container(border=True):
-        total_faturado = df_vendas_final[df_vendas_final['Data_Faturamento'].notna()]['Valor (R$)'].sum()
-        total_carregado = df_vendas_final[df_vendas_final['Data_Carregamento'].notna()]['Valor (R$)'].sum()
-        toneladas_vendidas = df_vendas_final[df_vendas_final['Data_Faturamento'].notna()]['Quantidade (Ton)'].sum()
+        kpis = cubo.indicadores(cubo_final)
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total Faturado", f"R$ {total_faturado:,.2f}")
-        col2.metric("Total Carregado", f"R$ {total_carregado:,.2f}")
-        col3.metric("Total de Toneladas Faturadas", f"{toneladas_vendidas:,.2f} Ton")
+        col1.metric("Total Faturado", f"R$ {kpis['total_faturado']:,.2f}")
+        col2.metric("Total Carregado", f"R$ {kpis['total_carregado']:,.2f}")
+        col3.metric("Total de Toneladas Faturadas", f"{kpis['toneladas_vendidas']:,.2f} Ton")
 
     st.markdown("---")
     st.subheader("Últimas Transações Faturadas")
-    ultimas_vendas = df_vendas_final[df_vendas_final['Data_Faturamento'].notna()].sort_values(by='Data_Faturamento', ascending=False).head(5)
+    ultimas_vendas = vendas_final.ultimas_faturadas(5)
     if ultimas_vendas.empty:
         st.info("Nenhuma venda faturada encontrada no período selecionado.")
     else:
-        for _, venda in ultimas_vendas.iterrows():
+        for data_fat, cliente_venda, produto_venda, valor_venda in zip(ultimas_vendas['Data_Faturamento'], ultimas_vendas['Cliente'], ultimas_vendas['Produto'], ultimas_vendas['Valor (R$)']):
             col1, col2, col3 = st.columns([1, 2, 1])
-            with col1: st.text(venda['Data_Faturamento'].strftime('%d/%m/%Y'))
-            with col2: st.text(f"{venda['Cliente']} - {venda['Produto']}")
-            with col3: st.markdown(f"<p style='text-align: right; color: #28a745; font-weight: bold;'>R$ {venda['Valor (R$)']:,.2f}</p>", unsafe_allow_html=True)
+            with col1: st.text(data_fat.strftime('%d/%m/%Y'))
+            with col2: st.text(f"{cliente_venda} - {produto_venda}")
+            with col3: st.markdown(f"<p style='text-align: right; color: #28a745; font-weight: bold;'>R$ {valor_venda:,.2f}</p>", unsafe_allow_html=True)
         st.markdown("<hr style='margin-top: 0; margin-bottom: 0;'>", unsafe_allow_html=True)
 
     st.markdown("---")
-    df_vendas_final['Mes_Faturamento'] = pd.to_datetime(df_vendas_final['Data_Faturamento']).dt.to_period('M').astype(str)
     col_graf1, col_graf2 = st.columns(2)
     with col_graf1:
         st.subheader("Vendas Faturadas por Mês")
-        vendas_faturadas = df_vendas_final[df_vendas_final['Mes_Faturamento'] != 'NaT'].groupby('Mes_Faturamento')['Valor (R$)'].sum().reset_index()
+        vendas_faturadas = cubo.faturado_por_mes(cubo_final)
         fig_faturado = px.bar(vendas_faturadas, x='Mes_Faturamento', y='Valor (R$)', text_auto=True, color_discrete_sequence=['#FFA500'])
         fig_faturado.update_traces(texttemplate='%{y:.2s}', textposition='outside')
         fig_faturado.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='white', uniformtext_minsize=8, uniformtext_mode='hide')
@@ -189,7 +265,7 @@ with tab1:
         
     with col_graf2:
         st.subheader("Toneladas Carregadas por Produto")
-        vendas_carregadas = df_vendas_final[df_vendas_final['Data_Carregamento'].notna()].groupby('Produto')['Quantidade (Ton)'].sum().reset_index()
+        vendas_carregadas = cubo.toneladas_carregadas_por_produto(cubo_final)
         if not vendas_carregadas.empty:
             fig_carregado = px.pie(vendas_carregadas, names='Produto', values='Quantidade (Ton)', hole=.4, color_discrete_sequence=px.colors.sequential.Oranges_r)
             fig_carregado.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='white')
@@ -197,52 +273,16 @@ with tab1:
         else:
             st.info("Nenhum produto carregado no período selecionado.")
 
-# ### INÍCIO DO CÓDIGO CORRIGIDO E APRIMORADO PARA A ABA DO MAPA ###
-with tab2:
+with tab2, rerun_perfil.medir("Aba 2 - Mapa"):
     st.header("🗺️ Mapa Geográfico de Clientes e Prospects")
     st.info("Visualize a localização dos seus clientes atuais (laranja) e dos prospects encontrados pela IA (verde).")
-    
-    # Lógica de centralização robusta
-    all_coords = []
-    # Adiciona coordenadas de clientes válidas
-    for _, row in df_clientes_final.iterrows():
-        # Verifica se lat/lon não são 0 e são números válidos
-        if pd.notna(row['Latitude']) and pd.notna(row['Longitude']) and row['Latitude'] != 0.0:
-            all_coords.append([row['Latitude'], row['Longitude']])
-            
-    # Adiciona coordenadas de prospects
-    for prospect in st.session_state.get('prospects', []):
-        all_coords.append([prospect['lat'], prospect['lon']])
-
-    if not all_coords:
-        # Ponto padrão (São Paulo) se não houver coordenadas
-        lat_center, lon_center = -23.55, -46.64
-        zoom_start = 8
+    prospects_mapa = tuple((p['nome'], p['desc'], p['lat'], p['lon']) for p in st.session_state.get('prospects', []))
+    html_mapa, tem_pontos = renderizar_mapa(df_clientes_final[['Cliente', 'Latitude', 'Longitude']], prospects_mapa)
+    if not tem_pontos:
         st.warning("Nenhum cliente ou prospect com coordenadas válidas para exibir no mapa.")
-    else:
-        # Calcula o centro a partir de todos os pontos
-        mean_lat = np.mean([coord[0] for coord in all_coords])
-        mean_lon = np.mean([coord[1] for coord in all_coords])
-        lat_center, lon_center = mean_lat, mean_lon
-        zoom_start = 6
-
-    # Cria o objeto do mapa com o novo tema claro
-    mapa = folium.Map(location=[lat_center, lon_center], zoom_start=zoom_start, tiles="CartoDB positron")
-    
-    # Adiciona marcadores de clientes ao mapa
-    for _, row in df_clientes_final.iterrows():
-        if pd.notna(row['Latitude']) and pd.notna(row['Longitude']) and row['Latitude'] != 0.0:
-            folium.Marker([row['Latitude'], row['Longitude']], popup=f"<b>Cliente:</b> {row['Cliente']}", tooltip=row['Cliente'], icon=folium.Icon(color="orange", icon="industry", prefix="fa")).add_to(mapa)
-    
-    # Adiciona marcadores de prospects ao mapa
-    for prospect in st.session_state.get('prospects', []):
-        folium.Marker([prospect['lat'], prospect['lon']], popup=f"<b>Prospect:</b> {prospect['nome']}<br>{prospect['desc']}", tooltip=prospect['nome'], icon=folium.Icon(color="green", icon="star", prefix="fa")).add_to(mapa)
-    
-    # Renderiza o mapa no Streamlit
-    st_folium(mapa, use_container_width=True, height=600)
-# ### FIM DO CÓDIGO CORRIGIDO PARA A ABA DO MAPA ###
-
-with tab3:
+    st.iframe(html_mapa, height=600)
+
+with tab3, rerun_perfil.medir("Aba 3 - Clientes"):
     st.header("Informações Detalhadas dos Clientes")
     with st.expander("➕ Adicionar Novo Cliente"):
         with st.form("novo_cliente_form", clear_on_submit=True):
@@ -254,28 +294,48 @@ with tab3:
             novo_cliente_lon = col_lon.number_input("Longitude", format="%.4f")
             novo_cliente_contrib = st.radio("É Contribuinte?", ('Sim', 'Não'), horizontal=True)
             submitted = st.form_submit_button("Adicionar Cliente", use_container_width=True)
+            st.caption("Com latitude e longitude em 0, as coordenadas são buscadas pela cidade; se ela não estiver na tabela, o cliente é salvo sem coordenadas e fica fora do mapa.")
             if submitted:
-                if novo_cliente_nome:
-                    novo_cliente_df = pd.DataFrame([{'Cliente': novo_cliente_nome, 'Cidade': novo_cliente_cidade, 'Latitude': novo_cliente_lat, 'Longitude': novo_cliente_lon, 'CNPJ': novo_cliente_cnpj, 'Contribuinte': novo_cliente_contrib}])
-                    st.session_state.df_clientes = pd.concat([st.session_state.df_clientes, novo_cliente_df], ignore_index=True)
-                    st.success(f"Cliente '{novo_cliente_nome}' adicionado!")
-                    st.rerun()
+                novo = pd.DataFrame([{'Cliente': novo_cliente_nome, 'Cidade': novo_cliente_cidade, 'Latitude': novo_cliente_lat, 'Longitude': novo_cliente_lon, 'CNPJ': novo_cliente_cnpj, 'Contribuinte': novo_cliente_contrib}])
+                aceitos, rejeitados = importacao.importar_clientes(novo, df_clientes, exigir_coordenadas=False)
+                if aceitos.empty:
+                    st.session_state.pop('relatorio_importacao', None)
+                    st.error(f"Cliente não adicionado: {rejeitados['Motivo'].iloc[0]}.")
                 else:
-                    st.error("O nome da empresa é obrigatório.")
+                    st.session_state.relatorio_importacao = (aceitos, rejeitados)
+                    st.rerun()
+    with st.expander("📥 Importar Clientes em Lote"):
+        st.caption("Planilha CSV ou Excel com as colunas Cliente, Cidade, Latitude, Longitude, CNPJ e Contribuinte. Coordenadas ausentes são preenchidas pela cidade.")
+        arquivo_clientes = st.file_uploader("Lista de clientes", type=['csv', 'xlsx', 'xls'], key="upload_clientes")
+        aceitar_sem_coordenadas = st.checkbox("Aceitar clientes sem coordenadas (ficam fora do mapa)", key="importar_sem_coordenadas")
+        if arquivo_clientes is not None and st.button("Importar Clientes", use_container_width=True):
+            try:
+                df_importado = importacao.ler_planilha_clientes(arquivo_clientes)
+            except ValueError as e:
+                st.error(f"Não foi possível ler a planilha: {e}")
+            else:
+                st.session_state.relatorio_importacao = importacao.importar_clientes(df_importado, df_clientes, exigir_coordenadas=not aceitar_sem_coordenadas)
+                st.rerun()
+    if 'relatorio_importacao' in st.session_state:
+        aceitos, rejeitados = st.session_state.relatorio_importacao
+        if not aceitos.empty:
+            st.success(f"{len(aceitos)} cliente(s) adicionado(s).")
+        if not rejeitados.empty:
+            st.warning(f"{len(rejeitados)} linha(s) recusada(s):")
+            st.dataframe(rejeitados, use_container_width=True, hide_index=True)
+        if st.button("Fechar relatório", key="fechar_relatorio_importacao"):
+            del st.session_state.relatorio_importacao
+            st.rerun()
     st.markdown("---")
-    df_vendas_com_faturamento = df_vendas_final[df_vendas_final['Data_Faturamento'].notna()]
-    if not df_vendas_com_faturamento.empty:
-        vendas_totais = df_vendas_com_faturamento.groupby('Cliente')['Valor (R$)'].sum().reset_index().rename(columns={'Valor (R$)': 'Valor Total Vendas'})
-        ultima_venda = df_vendas_com_faturamento.sort_values(by='Data_Faturamento', ascending=False).drop_duplicates('Cliente')[['Cliente', 'Data_Faturamento', 'Valor (R$)']].rename(columns={'Data_Faturamento': 'Data Última Venda', 'Valor (R$)': 'Valor Última Venda'})
-        df_display = pd.merge(df_clientes_final, vendas_totais, on='Cliente', how='left').merge(ultima_venda, on='Cliente', how='left')
-        df_display.fillna({'Valor Total Vendas': 0, 'Valor Última Venda': 0}, inplace=True)
+    if vendas_final.n_faturadas:
+        df_display = filtros.tabela_clientes(df_clientes_final, vendas_final.resumo_clientes)
         st.subheader("Lista de Clientes Atuais")
         st.dataframe(df_display, use_container_width=True, hide_index=True, column_config={"Valor Total Vendas": st.column_config.NumberColumn(format="R$ %.2f"), "Valor Última Venda": st.column_config.NumberColumn(format="R$ %.2f"), "Data Última Venda": st.column_config.DateColumn(format="DD/MM/YYYY")})
     else:
         st.warning("Nenhum dado de venda faturada encontrado no período.")
         st.dataframe(df_clientes_final, use_container_width=True, hide_index=True)
 
-with tab4:
+with tab4, rerun_perfil.medir("Aba 4 - Preços"):
     st.header("Análise de Preços de Mercado (Simulação com IA)")
     st.info("Selecione os filtros para que a IA simule o preço de mercado por KG para o item desejado.", icon="🤖")
     with st.form("pricing_form_detalhada"):
@@ -294,16 +354,21 @@ with tab4:
     if submit_pricing:
         if not client: st.error("Chave da API Groq não configurada.")
         else:
-            with st.spinner(f"Analisando o mercado..."):
-                prompt_pricing = f"""Atue como um analista de preços sênior do setor siderúrgico. Sua tarefa é fornecer uma estimativa de preço para o seguinte item: - Produto: {produto_especifico} - Espessura: {espessura:.2f} mm - Região de Venda: {regiao_pesquisa}. O relatório deve conter: 1. **Preço Estimado por KG:** Uma faixa de preço realista em Reais por quilograma (R$/kg). 2. **Principais Fatores de Influência:** Liste 3 a 4 fatores que impactam esse preço. 3. **Comentário de Mercado:** Um parágrafo curto com sua análise sobre a tendência. Formate a resposta de forma clara e profissional usando Markdown."""
-                try:
-                    chat_completion = client.chat.completions.create(messages=[{"role": "user", "content": prompt_pricing}], model="llama3-8b-8192")
-                    st.markdown("---"); st.subheader(f"Relatório de Mercado: {produto_especifico} ({espessura:.2f}mm)"); st.markdown(chat_completion.choices[0].message.content)
-                except Exception as e: st.error(f"Erro na análise: {e}")
-
-with tab5:
+            titulo_relatorio = f"Relatório de Mercado: {produto_especifico} ({espessura:.2f}mm)"
+            st.session_state.tarefas_ia['precos'] = {titulo_relatorio: enviar_consulta_ia(ia.prompt_precos(produto_especifico, espessura, regiao_pesquisa), 'precos', {'produto': produto_especifico, 'espessura': espessura, 'regiao': regiao_pesquisa}, descricao="Analisando o mercado")}
+
+    def exibir_relatorio_precos(tarefas_precos):
+        if mostrar_andamento('precos', tarefas_precos):
+            return
+        for titulo_relatorio, tarefa in tarefas_precos.items():
+            if tarefa.erro() is not None: st.error(f"Erro na análise: {tarefa.erro()}")
+            else: st.markdown("---"); st.subheader(titulo_relatorio); st.markdown(tarefa.resultado())
+
+    acompanhar_tarefas('precos', exibir_relatorio_precos)
+
+with tab5, rerun_perfil.medir("Aba 5 - Corte"):
     st.header("Orçamento de Serviços de Corte (Plasma/Laser/Oxicorte)")
-    st.info("Preencha os dados da peça para que a IA simule um orçamento de corte.", icon="🤖")
+    st.info("Preencha os dados da peça para calcular o orçamento de corte. A análise da IA é opcional.", icon="⚙️")
     with st.form("corte_form"):
         st.subheader("Parâmetros da Peça")
         col1, col2, col3 = st.columns(3)
@@ -315,27 +380,97 @@ with tab5:
             furos_inicios = st.number_input("Nº de Furos / Inícios:", 1, value=10)
         with col3:
             quantidade = st.number_input("Quantidade de Peças:", 1, value=1)
-        submit_corte = st.form_submit_button("Gerar Orçamento Simulado", use_container_width=True)
+            col_largura, col_altura = st.columns(2)
+            largura_chapa = col_largura.number_input("Largura da chapa (mm):", 0, value=0, help="Retângulo de chapa consumido por peça; deixe 0 quando o material é do cliente.")
+            altura_chapa = col_altura.number_input("Altura da chapa (mm):", 0, value=0)
+            incluir_analise_ia = st.checkbox("Incluir análise da IA", value=False)
+        submit_corte = st.form_submit_button("Gerar Orçamento", use_container_width=True)
     if submit_corte:
-        if not client: st.error("Chave da API Groq não configurada.")
-        else:
-            with st.spinner("A IA está calculando o orçamento..."):
-                prompt_corte = f"""Atue como um orçamentista de serviços de corte. Calcule o preço para UMA ÚNICA PEÇA com as seguintes especificações: - Material: {material_corte} - Espessura: {espessura_corte:.2f} mm - Comprimento de Corte: {comprimento_corte} mm - Furos: {furos_inicios}. Forneça uma análise de custos e, o mais importante, termine sua resposta com a linha 'PREÇO UNITÁRIO ESTIMADO: R$ XX.XX', substituindo XX.XX pelo valor numérico final."""
-                try:
-                    chat_completion = client.chat.completions.create(messages=[{"role": "user", "content": prompt_corte}], model="llama3-8b-8192")
-                    resposta_ia = chat_completion.choices[0].message.content
-                    st.markdown("---"); st.subheader("Análise de Custo da IA"); st.markdown(resposta_ia)
-                    preco_unitario_match = re.search(r'R\$\s*(\d+\.?\d*,\d+|\d+,\d+|\d+\.?\d*)', resposta_ia)
-                    if preco_unitario_match:
-                        preco_str = preco_unitario_match.group(1).replace('.', '').replace(',', '.')
-                        preco_unitario = float(preco_str)
-                        valor_total = preco_unitario * quantidade
-                        st.markdown("---"); st.subheader("Resumo do Orçamento")
-                        col_res1, col_res2, col_res3 = st.columns(3)
-                        col_res1.metric("Preço Unitário Estimado (IA)", f"R$ {preco_unitario:,.2f}")
-                        col_res2.metric("Quantidade Solicitada", f"{quantidade} pç(s)")
-                        col_res3.metric("VALOR TOTAL DO PEDIDO", f"R$ {valor_total:,.2f}")
-                    else:
-                        st.warning("Não foi possível extrair o preço unitário da resposta da IA.")
-                except Exception as e:
-                    st.error(f"Erro no orçamento: {e}")
+        area_corte = largura_chapa * altura_chapa
+        st.session_state.orcamento_corte = {'material': material_corte, 'espessura': espessura_corte, 'comprimento': comprimento_corte, 'furos': furos_inicios, 'quantidade': quantidade}
+        st.session_state.orcamento_corte['custos'] = corte.calcular_custos(material_corte, espessura_corte, comprimento_corte, furos_inicios, area_corte)
+        st.session_state.tarefas_ia.pop('analise_corte', None)
+        if incluir_analise_ia:
+            if not client: st.error("Chave da API Groq não configurada.")
+            else:
+                st.session_state.tarefas_ia['analise_corte'] = {'analise': enviar_consulta_ia(ia.prompt_analise_corte(material_corte, espessura_corte, comprimento_corte, furos_inicios, st.session_state.orcamento_corte['custos']), 'analise_corte', {'material': material_corte, 'espessura': espessura_corte, 'comprimento': comprimento_corte, 'furos': furos_inicios, 'area_mm2': area_corte}, descricao="A IA está analisando o orçamento")}
+    orcamento_corte = st.session_state.get('orcamento_corte')
+    if orcamento_corte:
+        custos_corte = orcamento_corte['custos']
+        preco_unitario = custos_corte['preco_unitario']
+        valor_total = preco_unitario * orcamento_corte['quantidade']
+        st.markdown("---"); st.subheader("Resumo do Orçamento")
+        col_res1, col_res2, col_res3 = st.columns(3)
+        col_res1.metric("Preço Unitário Estimado", f"R$ {preco_unitario:,.2f}")
+        col_res2.metric("Quantidade Solicitada", f"{orcamento_corte['quantidade']} pç(s)")
+        col_res3.metric("VALOR TOTAL DO PEDIDO", f"R$ {valor_total:,.2f}")
+        st.caption(f"{orcamento_corte['material']}, {orcamento_corte['espessura']:.2f} mm · Tempo de máquina: {custos_corte['tempo_min']:.2f} min/pç · Máquina: R$ {custos_corte['custo_maquina']:,.2f} · Consumíveis: R$ {custos_corte['custo_consumiveis']:,.2f} · Material: R$ {custos_corte['custo_material']:,.2f}")
+
+    def exibir_analise_corte(tarefas_corte):
+        if mostrar_andamento('analise_corte', tarefas_corte):
+            return
+        for tarefa in tarefas_corte.values():
+            if tarefa.erro() is not None: st.error(f"Erro na análise: {tarefa.erro()}")
+            else: st.markdown("---"); st.subheader("Análise de Custo da IA"); st.markdown(tarefa.resultado())
+
+    acompanhar_tarefas('analise_corte', exibir_analise_corte)
+
+    st.markdown("---")
+    with st.expander("📄 Orçamento em Lote (lista de peças)"):
+        st.caption(f"Envie um CSV ou Excel com as colunas: {', '.join(corte.COLUNAS_PECAS)} (opcionais: {', '.join(corte.COLUNAS_CHAPA)}, para incluir o material). O orçamento é calculado localmente; a consulta à IA é opcional.")
+        arquivo_pecas = st.file_uploader("Lista de peças:", type=["csv", "xlsx", "xls"])
+        pecas = None
+        if arquivo_pecas is not None:
+            try:
+                pecas = corte.ler_lista_pecas(arquivo_pecas)
+            except Exception as e:
+                st.error(f"Não foi possível ler a lista de peças: {e}")
+        if pecas is not None and pecas.empty:
+            st.warning("Nenhuma peça válida encontrada no arquivo.")
+        elif pecas is not None:
+            df_lote = corte.orcar_lote_local(pecas)
+            st.dataframe(df_lote, use_container_width=True, hide_index=True, column_config={"Preço Unitário (R$)": st.column_config.NumberColumn(format="R$ %.2f"), "Total (R$)": st.column_config.NumberColumn(format="R$ %.2f")})
+            col_lote1, col_lote2, col_lote3 = st.columns(3)
+            col_lote1.metric("Peças Orçadas", f"{(df_lote['Status'] == 'OK').sum()} de {len(df_lote)}")
+            col_lote2.metric("Quantidade Total", f"{df_lote['Quantidade'].sum()} pç(s)")
+            col_lote3.metric("VALOR TOTAL DO LOTE", f"R$ {df_lote['Total (R$)'].sum():,.2f}")
+
+            st.markdown("**Comparar com a IA**")
+            max_paralelo = st.slider("Consultas simultâneas à IA:", 1, 8, 4)
+            if st.button("Orçar Lista de Peças com IA", use_container_width=True):
+                if not client:
+                    st.error("Chave da API Groq não configurada.")
+                else:
+                    orcamento = partial(corte.orcar_lote, client, pecas, max_workers=max_paralelo, cache=cache_ia)
+                    st.session_state.tarefas_ia['lote_corte'] = {'lote': executor_lotes.enviar_gerador(orcamento, descricao="Orçando peças com IA", total=len(pecas))}
+
+        def exibir_lote_corte(tarefas_lote):
+            tarefa = tarefas_lote['lote']
+            resultados = list(tarefa.parciais)
+            if tarefa.em_andamento:
+                st.progress(len(resultados) / tarefa.total, text=f"{len(resultados)} de {tarefa.total} peças orçadas")
+                mostrar_andamento('lote_corte', tarefas_lote)
+            elif tarefa.erro() is not None:
+                st.error(f"Orçamento com IA interrompido: {tarefa.erro()}")
+            if resultados:
+                df_lote_ia = pd.DataFrame(resultados).sort_values('Linha')
+                st.dataframe(df_lote_ia, use_container_width=True, hide_index=True, column_config={"Preço Unitário (R$)": st.column_config.NumberColumn(format="R$ %.2f"), "Total (R$)": st.column_config.NumberColumn(format="R$ %.2f")})
+                if not tarefa.em_andamento:
+                    st.metric("VALOR TOTAL DO LOTE (IA)", f"R$ {df_lote_ia['Total (R$)'].sum():,.2f}")
+
+        acompanhar_tarefas('lote_corte', exibir_lote_corte)
+
+# =============================================================================
+# 5. PAINEL DE DESEMPENHO (DESENVOLVEDOR)
+# =============================================================================
+rerun_perfil.finalizar()
+st.sidebar.markdown("---")
+if st.sidebar.toggle("🛠️ Painel de desempenho", key="modo_desenvolvedor"):
+    with st.sidebar.expander("Tempo por seção (últimos reruns)", expanded=True):
+        st.dataframe(perfilador.resumo(), use_container_width=True, hide_index=True)
+        st.caption("Memória: variação do RSS do processo durante a seção (inclui outras sessões simultâneas).")
+        col_json, col_csv = st.columns(2)
+        col_json.download_button("JSON", perfilador.exportar_json(), file_name="perfil_dashboard.json", mime="application/json", use_container_width=True)
+        col_csv.download_button("CSV", perfilador.exportar_csv(), file_name="perfil_dashboard.csv", mime="text/csv", use_container_width=True)
+        if st.button("Limpar medições", use_container_width=True):
+            perfilador.limpar()
@@ -0,0 +1,156 @@
+# filtros.py
+"""Filtros de período e de clientes sobre a tabela de vendas, guardados como posições em vez de cópias."""
+
+from collections import OrderedDict
+from functools import cached_property
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+
+class MotorFiltros:
+    """
+    Mantém as vendas ordenadas por `Data_Venda` e as máscaras de faturada/carregada.
+
+    Deve ser criado uma única vez por versão dos dados; a seleção de ano/mês vira
+    uma busca binária (`searchsorted`) sobre as datas ordenadas. As últimas
+    combinações de filtros ficam guardadas como vetores de posições (não como
+    cópias das linhas), junto com os resumos pequenos já calculados sobre elas,
+    e são reaproveitadas entre reruns e sessões. O cache é limitado em bytes.
+    """
+
+    MAX_BYTES_EM_CACHE = 256 * 2**20
+
+    def __init__(self, df_vendas):
+        if not df_vendas['Data_Venda'].is_monotonic_increasing:
+            df_vendas = df_vendas.sort_values('Data_Venda', kind='stable', ignore_index=True)
+        self.vendas = df_vendas
+        self.datas = df_vendas['Data_Venda'].to_numpy()
+        self.datas_faturamento = df_vendas['Data_Faturamento'].to_numpy()
+        self.faturada = df_vendas['Data_Faturamento'].notna().to_numpy()
+        self.carregada = df_vendas['Data_Carregamento'].notna().to_numpy()
+        clientes = df_vendas['Cliente']
+        self._codigos_clientes = clientes.cat.codes.to_numpy() if isinstance(clientes.dtype, pd.CategoricalDtype) else None
+        self._tipo_posicao = np.int32 if len(df_vendas) < 2**31 else np.int64
+        self._filtros = OrderedDict()
+        self._bytes_em_cache = 0
+        self._trava = Lock()
+        self.anos = (np.unique(self.datas.astype('datetime64[Y]')).astype(int) + 1970).tolist()
+
+    def limpar_cache(self):
+        """Descarta as combinações de filtros guardadas."""
+        with self._trava:
+            self._filtros.clear()
+            self._bytes_em_cache = 0
+
+    def _intervalo(self, inicio, fim):
+        """Posições [ini, fim) das vendas com data em [inicio, fim)."""
+        return np.searchsorted(self.datas, np.datetime64(inicio, 'ns'), 'left'), np.searchsorted(self.datas, np.datetime64(fim, 'ns'), 'left')
+
+    def _intervalos(self, ano, mes):
+        if ano is None and mes is None:
+            return [(0, len(self.datas))]
+        if mes is None:
+            return [self._intervalo(f"{ano}-01-01", f"{ano + 1}-01-01")]
+        anos = [ano] if ano is not None else self.anos
+        inicio = [pd.Timestamp(year=a, month=mes, day=1) for a in anos]
+        return [self._intervalo(i, i + pd.offsets.MonthBegin()) for i in inicio]
+
+    def _mascara_clientes(self, ini, fim, clientes):
+        """Máscara das vendas em [ini, fim) cujos clientes estão em `clientes`."""
+        if self._codigos_clientes is not None:
+            codigos = self.vendas['Cliente'].cat.categories.get_indexer(list(clientes))
+            return np.isin(self._codigos_clientes[ini:fim], codigos[codigos >= 0])
+        return self.vendas['Cliente'].iloc[ini:fim].isin(clientes).to_numpy()
+
+    def _posicoes(self, intervalos, clientes):
+        """Posições das vendas nos intervalos de datas e clientes informados."""
+        partes = []
+        for ini, fim in intervalos:
+            posicoes = np.arange(ini, fim, dtype=self._tipo_posicao)
+            if clientes is not None:
+                posicoes = posicoes[self._mascara_clientes(ini, fim, clientes)]
+            partes.append(posicoes)
+        return np.concatenate(partes) if partes else np.empty(0, dtype=self._tipo_posicao)
+
+    def filtrar(self, ano=None, mes=None, clientes=None):
+        """Retorna as `VendasFiltradas` do período e clientes informados; `None` significa sem filtro."""
+        chave = (ano, mes, None if clientes is None else tuple(sorted(clientes)))
+        with self._trava:
+            if chave in self._filtros:
+                self._filtros.move_to_end(chave)
+                return self._filtros[chave]
+        filtradas = VendasFiltradas(self, self._posicoes(self._intervalos(ano, mes), clientes))
+        with self._trava:
+            if chave not in self._filtros:
+                self._filtros[chave] = filtradas
+                self._bytes_em_cache += filtradas.nbytes
+            # a combinação mais recente sempre fica, mesmo sozinha acima do limite
+            while self._bytes_em_cache > self.MAX_BYTES_EM_CACHE and len(self._filtros) > 1:
+                self._bytes_em_cache -= self._filtros.popitem(last=False)[1].nbytes
+        return filtradas
+
+
+class VendasFiltradas:
+    """
+    Vendas filtradas guardadas como posições na tabela do motor.
+
+    As subtabelas são montadas a cada acesso (e liberadas depois); só os
+    resultados pequenos e caros de recalcular (resumo por cliente, últimas
+    faturadas) ficam memoizados.
+    """
+
+    def __init__(self, motor, posicoes):
+        self._motor = motor
+        self._posicoes = posicoes
+        self._posicoes_faturadas = posicoes[motor.faturada[posicoes]]
+        self._posicoes_carregadas = posicoes[motor.carregada[posicoes]]
+        self._ultimas = {}
+        self.nbytes = self._posicoes.nbytes + self._posicoes_faturadas.nbytes + self._posicoes_carregadas.nbytes
+
+    @property
+    def vendas(self):
+        """Vendas do período e clientes selecionados."""
+        return self._motor.vendas.iloc[self._posicoes]
+
+    @property
+    def faturadas(self):
+        """Vendas filtradas que já foram faturadas."""
+        return self._motor.vendas.iloc[self._posicoes_faturadas]
+
+    @property
+    def carregadas(self):
+        """Vendas filtradas que já foram carregadas."""
+        return self._motor.vendas.iloc[self._posicoes_carregadas]
+
+    @property
+    def n_faturadas(self):
+        """Quantidade de vendas faturadas, sem montar a subtabela."""
+        return len(self._posicoes_faturadas)
+
+    def ultimas_faturadas(self, n=5):
+        """As `n` vendas faturadas mais recentes (seleção parcial em O(N), sem ordenar nem copiar a tabela)."""
+        if n not in self._ultimas:
+            datas = pd.Series(self._motor.datas_faturamento[self._posicoes_faturadas])
+            topo = datas.nlargest(n).index.to_numpy()
+            self._ultimas[n] = self._motor.vendas.iloc[self._posicoes_faturadas[topo]]
+        return self._ultimas[n]
+
+    @cached_property
+    def resumo_clientes(self):
+        """Total faturado e última venda faturada (data e valor) de cada cliente."""
+        if not self.n_faturadas:
+            return pd.DataFrame(columns=['Cliente', 'Valor Total Vendas', 'Data Última Venda', 'Valor Última Venda'])
+        faturadas = self._motor.vendas[['Cliente', 'Data_Faturamento', 'Valor (R$)']].iloc[self._posicoes_faturadas]
+        por_cliente = faturadas.groupby('Cliente', observed=True)
+        ultimas = faturadas.loc[por_cliente['Data_Faturamento'].idxmax(), ['Cliente', 'Data_Faturamento', 'Valor (R$)']]
+        resumo = por_cliente['Valor (R$)'].sum().rename('Valor Total Vendas').reset_index()
+        ultimas = ultimas.rename(columns={'Data_Faturamento': 'Data Última Venda', 'Valor (R$)': 'Valor Última Venda'})
+        return resumo.merge(ultimas, on='Cliente', how='left')
+
+
+def tabela_clientes(df_clientes, resumo_clientes):
+    """Junta aos clientes o total faturado e a última venda de cada um (zero para quem não comprou)."""
+    tabela = pd.merge(df_clientes, resumo_clientes, on='Cliente', how='left')
+    return tabela.fillna({'Valor Total Vendas': 0, 'Valor Última Venda': 0})
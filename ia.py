@@ -0,0 +1,202 @@
+# ia.py
+"""Chamadas à IA (Groq): prompts, extração das respostas e cache de respostas com TTL."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+from planilhas import sem_acentos
+
+MODELO_PADRAO = "llama3-8b-8192"
+TTL_PADRAO = float(os.environ.get("DASHBOARD_CACHE_IA_TTL", 24 * 3600))  # segundos
+
+
+# -----------------------------------------------------------------------------
+# Prompts e extração de dados das respostas
+# -----------------------------------------------------------------------------
+def prompt_prospeccao(localidade):
+    return f"""Atue como um assistente de vendas sênior para uma distribuidora de aço. Sua tarefa é encontrar 3 potenciais clientes reais na região de {localidade}. Foque em construtoras, metalúrgicas ou engenharias de estruturas. Para cada cliente, forneça: NOME, DESCRIÇÃO, LATITUDE e LONGITUDE. Retorne os dados estritamente no formato: - (NOME; DESCRIÇÃO; LATITUDE; LONGITUDE). Exemplo: - (Gerdau Aços Longos; Produz aço para construção civil; -23.55; -46.63)"""
+
+
+def prompt_precos(produto, espessura, regiao):
+    return f"""Atue como um analista de preços sênior do setor siderúrgico. Sua tarefa é fornecer uma estimativa de preço para o seguinte item: - Produto: {produto} - Espessura: {espessura:.2f} mm - Região de Venda: {regiao}. O relatório deve conter: 1. **Preço Estimado por KG:** Uma faixa de preço realista em Reais por quilograma (R$/kg). 2. **Principais Fatores de Influência:** Liste 3 a 4 fatores que impactam esse preço. 3. **Comentário de Mercado:** Um parágrafo curto com sua análise sobre a tendência. Formate a resposta de forma clara e profissional usando Markdown."""
+
+
+def prompt_corte(material, espessura, comprimento, furos):
+    return f"""Atue como um orçamentista de serviços de corte. Calcule o preço para UMA ÚNICA PEÇA com as seguintes especificações: - Material: {material} - Espessura: {espessura:.2f} mm - Comprimento de Corte: {comprimento} mm - Furos: {furos}. Forneça uma análise de custos e, o mais importante, termine sua resposta com a linha 'PREÇO UNITÁRIO ESTIMADO: R$ XX.XX', substituindo XX.XX pelo valor numérico final."""
+
+
+def prompt_analise_corte(material, espessura, comprimento, furos, custos):
+    return f"""Atue como um orçamentista de serviços de corte. Explique, de forma curta e profissional, o orçamento já calculado para UMA ÚNICA PEÇA com as seguintes especificações: - Material: {material} - Espessura: {espessura:.2f} mm - Comprimento de Corte: {comprimento} mm - Furos: {furos}. Valores calculados: tempo de máquina {custos['tempo_min']:.2f} min, custo de máquina R$ {custos['custo_maquina']:.2f}, consumíveis R$ {custos['custo_consumiveis']:.2f}, material R$ {custos['custo_material']:.2f}, preço unitário R$ {custos['preco_unitario']:.2f}. Comente os principais fatores de custo e dicas para reduzir o preço. Não recalcule o preço."""
+
+
+def extrair_prospects(texto):
+    """Extrai os prospects no formato `- (NOME; DESCRIÇÃO; LATITUDE; LONGITUDE)`."""
+    pattern = r'-\s*\((.*?);\s*(.*?);\s*(-?\d+\.?\d+);\s*(-?\d+\.?\d+)\)'
+    return [{"nome": m[0].strip(), "desc": m[1].strip(), "lat": float(m[2]), "lon": float(m[3])} for m in re.findall(pattern, texto)]
+
+
+def _valor_em_reais(texto):
+    """
+    Converte um valor como '1.234,56', '1,234.56', '42,50' ou '42.50' em float.
+
+    Com os dois separadores, o último é o decimal; com um só, vírgula é sempre
+    decimal e ponto só é decimal quando seguido de 1 ou 2 dígitos.
+    """
+    texto = texto.strip('.,')
+    virgula, ponto = texto.rfind(','), texto.rfind('.')
+    if virgula >= 0 and ponto >= 0:
+        milhar, decimal = ('.', ',') if virgula > ponto else (',', '.')
+    elif virgula >= 0:
+        milhar, decimal = '.', ','
+    elif ponto >= 0 and len(texto) - ponto - 1 in (1, 2) and texto.count('.') == 1:
+        milhar, decimal = ',', '.'
+    else:
+        milhar, decimal = '.', ','
+    return float(texto.replace(milhar, '').replace(decimal, '.'))
+
+
+def extrair_preco_unitario(texto):
+    """
+    Extrai o preço da linha 'PREÇO UNITÁRIO ESTIMADO: R$ ...' (a última, se houver várias).
+
+    Sem essa linha, usa o último valor em R$ da resposta; retorna None se não houver nenhum.
+    """
+    valores = re.findall(r'PRE[CÇ]O\s+UNIT[AÁ]RIO\s+ESTIMADO\W*R\$\s*(\d[\d.,]*)', texto, flags=re.IGNORECASE)
+    if not valores:
+        valores = re.findall(r'R\$\s*(\d[\d.,]*)', texto)
+    if not valores:
+        return None
+    return _valor_em_reais(valores[-1])
+
+
+# -----------------------------------------------------------------------------
+# Cache de respostas
+# -----------------------------------------------------------------------------
+def _normalizar(valor):
+    """Normaliza um parâmetro para a chave do cache: texto sem acentos/caixa/espaços extras, números arredondados."""
+    if hasattr(valor, 'item') and hasattr(valor, 'dtype'):  # escalares NumPy viram tipos nativos
+        valor = valor.item()
+    if isinstance(valor, str):
+        return sem_acentos(valor)
+    if isinstance(valor, float):
+        return round(valor, 2)
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    return valor
+
+
+def chave_cache(tipo, modelo, parametros):
+    """Chave estável a partir do tipo de consulta, do modelo e dos parâmetros normalizados."""
+    conteudo = json.dumps([tipo, modelo, _normalizar(parametros)], sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+class CacheRespostas:
+    """
+    Cache LRU de respostas da IA com TTL, opcionalmente gravado em SQLite.
+
+    A memória guarda até `max_itens` respostas; o arquivo em disco (se
+    informado) permite reaproveitar as respostas depois de reiniciar o app.
+    """
+
+    def __init__(self, caminho=None, ttl=TTL_PADRAO, max_itens=512):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.acertos = 0
+        self.falhas = 0
+        self._memoria = OrderedDict()  # chave -> (expira_em, resposta)
+        self._trava = Lock()
+        self._conexao = None
+        if caminho is not None:
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+            self._conexao = sqlite3.connect(str(caminho), check_same_thread=False)
+            self._conexao.execute("CREATE TABLE IF NOT EXISTS respostas (chave TEXT PRIMARY KEY, expira_em REAL, resposta TEXT)")
+            self._conexao.execute("DELETE FROM respostas WHERE expira_em < ?", (time.time(),))
+            self._conexao.commit()
+
+    def obter(self, chave):
+        """Retorna a resposta guardada ou None (contabilizando acerto/falha)."""
+        agora = time.time()
+        with self._trava:
+            item = self._memoria.get(chave)
+            if item is None and self._conexao is not None:
+                linha = self._conexao.execute("SELECT expira_em, resposta FROM respostas WHERE chave = ?", (chave,)).fetchone()
+                if linha is not None:
+                    item = tuple(linha)
+                    self._guardar_memoria(chave, item)
+            if item is not None and item[0] >= agora:
+                self._memoria.move_to_end(chave)
+                self.acertos += 1
+                return item[1]
+            if item is not None:
+                self._remover(chave)
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave, resposta):
+        item = (time.time() + self.ttl, resposta)
+        with self._trava:
+            self._guardar_memoria(chave, item)
+            if self._conexao is not None:
+                self._conexao.execute("INSERT OR REPLACE INTO respostas VALUES (?, ?, ?)", (chave, *item))
+                self._conexao.commit()
+
+    def _guardar_memoria(self, chave, item):
+        self._memoria[chave] = item
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens:
+            self._memoria.popitem(last=False)
+
+    def _remover(self, chave):
+        self._memoria.pop(chave, None)
+        if self._conexao is not None:
+            self._conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+            self._conexao.commit()
+
+    def limpar(self):
+        """Descarta todas as respostas e zera os contadores."""
+        with self._trava:
+            self._memoria.clear()
+            self.acertos = self.falhas = 0
+            if self._conexao is not None:
+                self._conexao.execute("DELETE FROM respostas")
+                self._conexao.commit()
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {'acertos': self.acertos, 'falhas': self.falhas, 'itens_em_memoria': len(self._memoria), 'taxa_acerto': self.acertos / consultas if consultas else 0.0}
+
+
+def perguntar(client, prompt, tipo, parametros, cache=None, modelo=MODELO_PADRAO, timeout=None, limitador=None):
+    """
+    Envia o prompt à IA e retorna o texto da resposta.
+
+    Com `cache`, respostas para o mesmo (`tipo`, `modelo`, `parametros`
+    normalizados) são reaproveitadas enquanto não expirarem. `timeout` (s) é
+    repassado à API. `limitador` (com um método `aguardar()`) só é acionado
+    quando a consulta de fato vai à API; acertos no cache não esperam.
+    Erros da API não são guardados e são propagados para quem chamou.
+    """
+    chave = chave_cache(tipo, modelo, parametros)
+    if cache is not None:
+        resposta = cache.obter(chave)
+        if resposta is not None:
+            return resposta
+    if limitador is not None:
+        limitador.aguardar()
+    opcoes = {} if timeout is None else {'timeout': timeout}
+    chat_completion = client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model=modelo, **opcoes)
+    resposta = chat_completion.choices[0].message.content
+    if cache is not None:
+        cache.guardar(chave, resposta)
+    return resposta
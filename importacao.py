@@ -0,0 +1,179 @@
+# importacao.py
+"""Importação de clientes em lote: validação vetorizada, deduplicação e coordenadas por cidade."""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import armazenamento
+from dados import COLUNAS_CLIENTES, PESOS_CNPJ_DV1, PESOS_CNPJ_DV2
+from mapa import coordenadas_validas
+from planilhas import ler_planilha, normalizar_textos
+
+ARQUIVO_CIDADES = Path(os.environ.get("DASHBOARD_CIDADES_CSV", Path(__file__).resolve().parent / "cidades_coordenadas.csv"))
+
+# Nomes aceitos na planilha (sem acentos, minúsculos) para cada coluna de clientes
+ALIASES_COLUNAS = {
+    'cliente': 'Cliente', 'nome': 'Cliente', 'empresa': 'Cliente', 'nome da empresa': 'Cliente', 'razao social': 'Cliente',
+    'cidade': 'Cidade', 'municipio': 'Cidade',
+    'latitude': 'Latitude', 'lat': 'Latitude',
+    'longitude': 'Longitude', 'lon': 'Longitude', 'lng': 'Longitude',
+    'cnpj': 'CNPJ',
+    'contribuinte': 'Contribuinte', 'e contribuinte?': 'Contribuinte', 'contribuinte icms': 'Contribuinte',
+}
+
+
+# -----------------------------------------------------------------------------
+# CNPJ
+# -----------------------------------------------------------------------------
+def digitos_cnpj(serie):
+    """Apenas os dígitos de cada CNPJ."""
+    return serie.fillna('').astype(str).str.replace(r'\D', '', regex=True)
+
+
+def cnpj_valido(serie, verificar_digitos=True):
+    """Máscara vetorizada dos CNPJs com 14 dígitos, não repetidos e (opcionalmente) com dígitos verificadores corretos."""
+    digitos = digitos_cnpj(serie)
+    validos = (digitos.str.len() == 14).to_numpy(copy=True)
+    if not validos.any():
+        return validos
+    matriz = np.frombuffer(''.join(digitos[validos]).encode('ascii'), dtype=np.uint8).reshape(-1, 14).astype(np.int64) - ord('0')
+    ok = (matriz != matriz[:, :1]).any(axis=1)  # 00000000000000, 11111111111111... são inválidos
+    if verificar_digitos:
+        for posicao, pesos in ((12, PESOS_CNPJ_DV1), (13, PESOS_CNPJ_DV2)):
+            resto = (matriz[:, :posicao] @ np.array(pesos)) % 11
+            ok &= matriz[:, posicao] == np.where(resto < 2, 0, 11 - resto)
+    validos[validos] = ok
+    return validos
+
+
+def formatar_cnpj(serie):
+    """Formata CNPJs de 14 dígitos como XX.XXX.XXX/XXXX-XX."""
+    return digitos_cnpj(serie).str.replace(r'^(\d{2})(\d{3})(\d{3})(\d{4})(\d{2})$', r'\1.\2.\3/\4-\5', regex=True)
+
+
+# -----------------------------------------------------------------------------
+# Coordenadas por cidade
+# -----------------------------------------------------------------------------
+@lru_cache(maxsize=4)
+def tabela_cidades(arquivo=ARQUIVO_CIDADES):
+    """Tabela cidade/UF → latitude/longitude, lida uma única vez e mantida em memória."""
+    cidades = pd.read_csv(arquivo, dtype={'Cidade': str, 'UF': str})
+    cidades['chave_cidade'] = normalizar_textos(cidades['Cidade'])
+    cidades['chave_uf'] = normalizar_textos(cidades['UF'])
+    return cidades
+
+
+def separar_cidade_uf(serie):
+    """Separa 'Campinas, SP', 'Campinas - SP' ou 'Campinas/SP' em (cidade, uf) normalizados; uf vazia quando ausente."""
+    texto = normalizar_textos(serie)
+    partes = texto.str.extract(r'^(.*?)(?:\s*[,/-]\s*([a-z]{2}))?$')
+    return partes[0].fillna('').str.strip(), partes[1].fillna('')
+
+
+def coordenadas_por_cidade(serie, arquivo=ARQUIVO_CIDADES):
+    """Latitude e longitude de cada cidade pela tabela local (NaN quando a cidade não está na tabela)."""
+    cidades = tabela_cidades(arquivo)
+    # listas de clientes repetem muito as cidades: a busca é feita só nos valores distintos
+    codigos, unicas = pd.factorize(pd.Series(serie).fillna('').astype(str))
+    chave_cidade, chave_uf = separar_cidade_uf(pd.Series(unicas))
+    consulta = pd.DataFrame({'chave_cidade': chave_cidade.to_numpy(), 'chave_uf': chave_uf.to_numpy()})
+    com_uf = consulta.merge(cidades.drop_duplicates(['chave_cidade', 'chave_uf'])[['chave_cidade', 'chave_uf', 'Latitude', 'Longitude']], on=['chave_cidade', 'chave_uf'], how='left')
+    so_cidade = consulta[['chave_cidade']].merge(cidades.drop_duplicates('chave_cidade')[['chave_cidade', 'Latitude', 'Longitude']], on='chave_cidade', how='left')
+    # sem UF informada, vale a primeira cidade com o mesmo nome
+    sem_uf = (consulta['chave_uf'] == '').to_numpy()
+    lat = np.where(sem_uf, so_cidade['Latitude'], com_uf['Latitude']).astype(float)
+    lon = np.where(sem_uf, so_cidade['Longitude'], com_uf['Longitude']).astype(float)
+    return lat[codigos], lon[codigos]
+
+
+def completar_coordenadas(df):
+    """Preenche Latitude/Longitude ausentes ou inválidas a partir da cidade; devolve uma cópia."""
+    df = df.copy()
+    for coluna in ('Latitude', 'Longitude'):
+        df[coluna] = pd.to_numeric(df[coluna].astype(str).str.replace(',', '.'), errors='coerce')
+    faltando = ~coordenadas_validas(df['Latitude'], df['Longitude'])
+    if faltando.any():
+        lat, lon = coordenadas_por_cidade(df.loc[faltando, 'Cidade'])
+        df.loc[faltando, 'Latitude'] = lat
+        df.loc[faltando, 'Longitude'] = lon
+    return df
+
+
+def validar_prospects(prospects):
+    """Separa os prospects da IA em (com coordenadas válidas, quantidade descartada); não inventa posições para os demais."""
+    if not prospects:
+        return [], 0
+    df = pd.DataFrame(prospects)
+    validos = coordenadas_validas(df['lat'], df['lon'])
+    return df[validos].to_dict('records'), int((~validos).sum())
+
+
+# -----------------------------------------------------------------------------
+# Importação
+# -----------------------------------------------------------------------------
+def ler_planilha_clientes(arquivo, nome=None):
+    """Lê uma planilha de clientes (CSV ou Excel) e padroniza os nomes das colunas."""
+    df = ler_planilha(arquivo, ALIASES_COLUNAS, nome, dtype=str)
+    if 'Cliente' not in df.columns:
+        raise ValueError("A planilha precisa de uma coluna com o nome do cliente (Cliente/Nome/Empresa).")
+    for coluna in COLUNAS_CLIENTES:
+        if coluna not in df.columns:
+            df[coluna] = np.nan
+    return df[COLUNAS_CLIENTES]
+
+
+def preparar_importacao(df_novos, df_existentes, verificar_digitos=True, exigir_coordenadas=True):
+    """
+    Valida e deduplica clientes novos contra os existentes, tudo de forma vetorizada.
+
+    Retorna (aceitos, rejeitados). `aceitos` tem as colunas de clientes, com
+    CNPJ formatado, Contribuinte 'Sim'/'Não' e coordenadas completadas pela
+    cidade; `rejeitados` traz as linhas recusadas com a coluna `Motivo`. Com
+    `exigir_coordenadas=False`, clientes sem coordenadas válidas (nem cidade na
+    tabela) são aceitos com Latitude/Longitude vazias e ficam fora do mapa.
+    """
+    df = df_novos.reset_index(drop=True).copy()
+    df['Cliente'] = df['Cliente'].fillna('').astype(str).str.strip()
+    df['Cidade'] = df['Cidade'].fillna('').astype(str).str.strip()
+    contribuinte = normalizar_textos(df['Contribuinte'])
+    df['Contribuinte'] = np.where(contribuinte.isin(['nao', 'n', 'false', '0', 'no']), 'Não', 'Sim')
+    df = completar_coordenadas(df)
+    sem_coordenadas = ~coordenadas_validas(df['Latitude'], df['Longitude'])
+    if not exigir_coordenadas:
+        df.loc[sem_coordenadas, ['Latitude', 'Longitude']] = np.nan
+
+    chave_nome = normalizar_textos(df['Cliente'])
+    chave_cnpj = digitos_cnpj(df['CNPJ'])
+    nomes_existentes = set(normalizar_textos(df_existentes['Cliente']))
+    cnpjs_existentes = set(digitos_cnpj(df_existentes['CNPJ'])) - {''}
+
+    # a primeira regra violada (na ordem abaixo) vira o motivo da rejeição
+    regras = [
+        (chave_nome == '', "Nome da empresa vazio"),
+        (~cnpj_valido(df['CNPJ'], verificar_digitos), "CNPJ inválido"),
+        (sem_coordenadas & exigir_coordenadas, "Coordenadas inválidas e cidade não encontrada na tabela"),
+        (chave_cnpj.isin(cnpjs_existentes), "CNPJ já cadastrado"),
+        (chave_nome.isin(nomes_existentes), "Cliente já cadastrado"),
+        (chave_cnpj.duplicated(), "CNPJ repetido na planilha"),
+        (chave_nome.duplicated(), "Cliente repetido na planilha"),
+    ]
+    condicoes = [np.asarray(mascara, dtype=bool) for mascara, _ in regras]
+    motivo = pd.Series(np.select(condicoes, [m for _, m in regras], default=''), index=df.index)
+    rejeitada = motivo != ''
+
+    aceitos = df[~rejeitada].copy()
+    aceitos['CNPJ'] = formatar_cnpj(aceitos['CNPJ'])
+    rejeitados = df_novos.reset_index(drop=True)[rejeitada.to_numpy()].assign(Motivo=motivo[rejeitada].to_numpy())
+    return aceitos[COLUNAS_CLIENTES].reset_index(drop=True), rejeitados
+
+
+def importar_clientes(df_novos, df_existentes, verificar_digitos=True, exigir_coordenadas=True, diretorio=armazenamento.DIRETORIO_BASE):
+    """Valida, deduplica e grava os clientes aceitos numa única escrita; retorna (aceitos, rejeitados)."""
+    aceitos, rejeitados = preparar_importacao(df_novos, df_existentes, verificar_digitos, exigir_coordenadas)
+    if not aceitos.empty:
+        armazenamento.adicionar_clientes(aceitos, diretorio)
+    return aceitos, rejeitados
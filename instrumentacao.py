@@ -0,0 +1,132 @@
+# instrumentacao.py
+"""Medição do tempo e da memória de cada seção do dashboard, com resumo p50/p95 dos últimos reruns."""
+
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+MAX_RERUNS = int(os.environ.get("DASHBOARD_PERFIL_MAX_RERUNS", 200))
+ARQUIVO_LOG = os.environ.get("DASHBOARD_PERFIL_LOG")  # JSON lines; vazio desativa a gravação em disco
+_TAMANHO_PAGINA = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def memoria_atual():
+    """Memória residente (RSS) do processo em bytes; sem /proc, usa o pico (ru_maxrss), e 0 onde nem isso existe (Windows)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _TAMANHO_PAGINA
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == 'darwin' else pico * 1024  # bytes no macOS, KiB nos demais
+
+
+class Rerun:
+    """Medições de uma execução do script; as seções são medidas com `medir`."""
+
+    def __init__(self, perfilador):
+        self._perfilador = perfilador
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+        self._t0 = time.perf_counter()
+        self._m0 = memoria_atual()
+        self.secoes = []
+
+    @contextmanager
+    def medir(self, secao):
+        t0, m0 = time.perf_counter(), memoria_atual()
+        try:
+            yield
+        finally:
+            self.secoes.append({'secao': secao, 'ms': (time.perf_counter() - t0) * 1000, 'memoria_mb': (memoria_atual() - m0) / 2**20})
+
+    def finalizar(self):
+        """Registra o rerun completo (com a seção 'Total') no perfilador."""
+        self.secoes.append({'secao': 'Total', 'ms': (time.perf_counter() - self._t0) * 1000, 'memoria_mb': (memoria_atual() - self._m0) / 2**20})
+        self._perfilador.registrar(self.inicio, self.secoes)
+
+
+class Perfilador:
+    """
+    Guarda as medições dos últimos `max_reruns` reruns (de todas as sessões).
+
+    Chamadas externas (IA), que rodam fora do rerun, entram como registros de
+    uma única seção via `cronometrar`.
+    """
+
+    def __init__(self, max_reruns=MAX_RERUNS, arquivo_log=ARQUIVO_LOG):
+        self._registros = deque(maxlen=max_reruns)
+        self._trava = threading.Lock()
+        self.arquivo_log = arquivo_log
+
+    def iniciar_rerun(self):
+        return Rerun(self)
+
+    def registrar(self, inicio, secoes):
+        registro = {'inicio': inicio, 'secoes': secoes}
+        with self._trava:
+            self._registros.append(registro)
+            if self.arquivo_log:
+                with open(self.arquivo_log, 'a', encoding='utf-8') as log:
+                    log.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def cronometrar(self, secao, funcao):
+        """Envolve `funcao` para que cada chamada (mesmo com erro) seja registrada como a seção `secao`."""
+        @wraps(funcao)
+        def registrada(*args, **kwargs):
+            inicio = datetime.now().isoformat(timespec='seconds')
+            t0, m0 = time.perf_counter(), memoria_atual()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.registrar(inicio, [{'secao': secao, 'ms': (time.perf_counter() - t0) * 1000, 'memoria_mb': (memoria_atual() - m0) / 2**20}])
+        return registrada
+
+    def medicoes(self):
+        """Todas as medições guardadas, uma linha por (rerun, seção)."""
+        with self._trava:
+            registros = list(self._registros)
+        linhas = [{'rerun': i, 'inicio': r['inicio'], **s} for i, r in enumerate(registros) for s in r['secoes']]
+        return pd.DataFrame(linhas, columns=['rerun', 'inicio', 'secao', 'ms', 'memoria_mb'])
+
+    def resumo(self):
+        """p50/p95/máximo do tempo e variação média de memória por seção."""
+        medicoes = self.medicoes()
+        if medicoes.empty:
+            return pd.DataFrame(columns=['secao', 'execucoes', 'p50_ms', 'p95_ms', 'max_ms', 'memoria_media_mb'])
+        por_secao = medicoes.groupby('secao', sort=False)
+        resumo = por_secao['ms'].agg(
+            execucoes='count',
+            p50_ms=lambda ms: np.percentile(ms, 50),
+            p95_ms=lambda ms: np.percentile(ms, 95),
+            max_ms='max',
+        )
+        resumo['memoria_media_mb'] = por_secao['memoria_mb'].mean()
+        return resumo.reset_index().round(2)
+
+    def exportar_json(self):
+        with self._trava:
+            return json.dumps(list(self._registros), ensure_ascii=False, indent=2)
+
+    def exportar_csv(self):
+        buffer = io.StringIO()
+        self.medicoes().to_csv(buffer, index=False, quoting=csv.QUOTE_MINIMAL)
+        return buffer.getvalue()
+
+    def limpar(self):
+        with self._trava:
+            self._registros.clear()
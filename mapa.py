@@ -0,0 +1,76 @@
+# mapa.py
+"""Preparação das coordenadas e montagem do mapa de clientes e prospects."""
+
+from html import escape
+
+import folium
+import numpy as np
+import pandas as pd
+from folium.plugins import FastMarkerCluster, MarkerCluster
+
+CENTRO_PADRAO = (-23.55, -46.64)  # São Paulo, usado quando não há coordenadas válidas
+ZOOM_PADRAO, ZOOM_COM_PONTOS = 8, 6
+
+# Os marcadores de clientes são criados no navegador pelo FastMarkerCluster, que recebe
+# apenas [lat, lon, nome] de cada cliente; assim o HTML não cresce com um bloco de JS por marcador.
+CALLBACK_CLIENTE = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'industry', prefix: 'fa', markerColor: 'orange'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindTooltip(row[2]);
+    marker.bindPopup('<b>Cliente:</b> ' + row[2]);
+    return marker;
+}
+"""
+
+
+def coordenadas_validas(latitudes, longitudes):
+    """Máscara vetorizada das coordenadas utilizáveis: numéricas, dentro da faixa e não nulas (0, 0)."""
+    lat = pd.to_numeric(pd.Series(latitudes), errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(pd.Series(longitudes), errors='coerce').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        return np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180) & (lat != 0.0)
+
+
+def preparar_pontos(df_clientes, prospects):
+    """
+    Separa os clientes e prospects com coordenadas válidas e calcula o centro do mapa.
+
+    Retorna (clientes, prospects, centro, zoom); `clientes` e `prospects` são
+    DataFrames com as colunas nome/lat/lon (e desc, para prospects), sem repetições.
+    """
+    validos = coordenadas_validas(df_clientes['Latitude'], df_clientes['Longitude'])
+    clientes = pd.DataFrame({
+        'nome': df_clientes['Cliente'].to_numpy()[validos],
+        'lat': df_clientes['Latitude'].to_numpy(dtype=float)[validos],
+        'lon': df_clientes['Longitude'].to_numpy(dtype=float)[validos],
+    }).drop_duplicates()
+    df_prospects = pd.DataFrame(list(prospects), columns=['nome', 'desc', 'lat', 'lon'])
+    df_prospects = df_prospects[coordenadas_validas(df_prospects['lat'], df_prospects['lon'])].drop_duplicates()
+
+    if clientes.empty and df_prospects.empty:
+        return clientes, df_prospects, CENTRO_PADRAO, ZOOM_PADRAO
+    lat = np.concatenate([clientes['lat'].to_numpy(), df_prospects['lat'].to_numpy(dtype=float)])
+    lon = np.concatenate([clientes['lon'].to_numpy(), df_prospects['lon'].to_numpy(dtype=float)])
+    return clientes, df_prospects, (lat.mean(), lon.mean()), ZOOM_COM_PONTOS
+
+
+def construir_mapa(clientes, prospects, centro, zoom):
+    """Monta o mapa com clientes agrupados (FastMarkerCluster) e prospects num MarkerCluster próprio."""
+    mapa = folium.Map(location=list(centro), zoom_start=zoom, tiles="CartoDB positron")
+    if not clientes.empty:
+        nomes = [escape(str(nome)) for nome in clientes['nome']]
+        dados = [list(ponto) for ponto in zip(clientes['lat'].tolist(), clientes['lon'].tolist(), nomes)]
+        FastMarkerCluster(dados, callback=CALLBACK_CLIENTE, name="Clientes").add_to(mapa)
+    if not prospects.empty:
+        grupo = MarkerCluster(name="Prospects").add_to(mapa)
+        for nome, desc, lat, lon in zip(prospects['nome'], prospects['desc'], prospects['lat'], prospects['lon']):
+            folium.Marker([lat, lon], popup=f"<b>Prospect:</b> {escape(str(nome))}<br>{escape(str(desc))}", tooltip=escape(str(nome)), icon=folium.Icon(color="green", icon="star", prefix="fa")).add_to(grupo)
+    return mapa
+
+
+def mapa_html(df_clientes, prospects):
+    """Retorna (html do mapa, há pontos válidos?) para os clientes e prospects informados."""
+    clientes, df_prospects, centro, zoom = preparar_pontos(df_clientes, prospects)
+    mapa = construir_mapa(clientes, df_prospects, centro, zoom)
+    return mapa.get_root().render(), not (clientes.empty and df_prospects.empty)
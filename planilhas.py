@@ -0,0 +1,35 @@
+# planilhas.py
+"""Leitura das planilhas enviadas pelo usuário e normalização de textos para comparação."""
+
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+
+
+def sem_acentos(texto):
+    """Texto sem acentos, minúsculo e com espaços simples."""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
+
+
+def normalizar_textos(serie):
+    """Versão vetorizada de `sem_acentos` para uma Series (valores ausentes viram texto vazio)."""
+    return (serie.fillna('').astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.lower().str.replace(r'\s+', ' ', regex=True).str.strip())
+
+
+def ler_planilha(arquivo, aliases, nome=None, dtype=None):
+    """
+    Lê um CSV (separador detectado) ou Excel e renomeia as colunas pelos `aliases`.
+
+    `arquivo` pode ser um caminho ou um objeto de arquivo (ex.: o retorno do
+    `st.file_uploader`); o formato é deduzido pela extensão de `nome`. As
+    chaves de `aliases` são os nomes de coluna já passados por `sem_acentos`.
+    """
+    nome = nome or getattr(arquivo, 'name', None) or str(arquivo)
+    if Path(nome).suffix.lower() in ('.xlsx', '.xls'):
+        df = pd.read_excel(arquivo, dtype=dtype)
+    else:
+        df = pd.read_csv(arquivo, sep=None, engine='python', dtype=dtype)
+    return df.rename(columns=lambda c: aliases.get(sem_acentos(c), c))
@@ -0,0 +1,103 @@
+# tarefas.py
+"""Execução de chamadas à IA em segundo plano, com consulta de estado, timeout e cancelamento."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+PENDENTE, EXECUTANDO, CONCLUIDA, ERRO, CANCELADA, EXPIRADA = 'pendente', 'executando', 'concluída', 'erro', 'cancelada', 'expirada'
+EM_ANDAMENTO = (PENDENTE, EXECUTANDO)
+TIMEOUT_PADRAO = 90.0  # segundos
+MAX_LOTES_SIMULTANEOS = 2  # lotes longos têm pool próprio para não ocupar as threads das consultas rápidas
+
+
+class Tarefa:
+    """Uma chamada enviada ao executor; guardada no session_state de quem a enviou."""
+
+    def __init__(self, futuro, descricao='', timeout=TIMEOUT_PADRAO, total=None):
+        self._futuro = futuro
+        self.descricao = descricao
+        self.timeout = timeout
+        self.total = total
+        self.parciais = []  # itens já produzidos, nas tarefas enviadas com `enviar_gerador`
+        self.criada_em = time.monotonic()
+        self._cancelada = False
+
+    @property
+    def decorrido(self):
+        return time.monotonic() - self.criada_em
+
+    @property
+    def estado(self):
+        if self._cancelada or self._futuro.cancelled():
+            return CANCELADA
+        if self._futuro.done():
+            return ERRO if self._futuro.exception() is not None else CONCLUIDA
+        if self.timeout is not None and self.decorrido > self.timeout:
+            return EXPIRADA
+        return EXECUTANDO if self._futuro.running() else PENDENTE
+
+    @property
+    def em_andamento(self):
+        return self.estado in EM_ANDAMENTO
+
+    def resultado(self):
+        """Resultado da tarefa concluída; `None` se ainda não terminou, foi cancelada ou expirou. Propaga o erro da chamada."""
+        if self.estado != CONCLUIDA and self.estado != ERRO:
+            return None
+        return self._futuro.result()
+
+    def erro(self):
+        """Exceção da tarefa (ou a descrição do timeout/cancelamento); `None` se não houve erro."""
+        estado = self.estado
+        if estado == ERRO:
+            return self._futuro.exception()
+        if estado == EXPIRADA:
+            return TimeoutError(f"Sem resposta após {self.timeout:.0f} s")
+        if estado == CANCELADA:
+            return RuntimeError("Tarefa cancelada")
+        return None
+
+    def cancelar(self):
+        """
+        Cancela a tarefa; se ela já estiver em execução, o resultado é descartado quando chegar.
+
+        Tarefas de `enviar_gerador` param de consumir o gerador no próximo item.
+        """
+        self._futuro.cancel()
+        self._cancelada = True
+
+
+class ExecutorTarefas:
+    """Pool de threads compartilhado entre as sessões para as chamadas à IA (ou, com outro `nome`, para os lotes)."""
+
+    def __init__(self, max_workers=8, nome='tarefa-ia'):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=nome)
+
+    def enviar(self, funcao, *args, descricao='', timeout=TIMEOUT_PADRAO, **kwargs):
+        """Agenda `funcao(*args, **kwargs)` e retorna a `Tarefa` correspondente sem esperar o resultado."""
+        return Tarefa(self._executor.submit(funcao, *args, **kwargs), descricao=descricao, timeout=timeout)
+
+    def enviar_gerador(self, gerador, *args, descricao='', timeout=None, total=None, **kwargs):
+        """
+        Consome `gerador(*args, **kwargs)` em segundo plano e retorna a `Tarefa` sem esperar.
+
+        Cada item produzido vai para `tarefa.parciais` assim que chega (para
+        exibir o progresso); o resultado final é a lista completa. Cancelar a
+        tarefa interrompe o consumo e fecha o gerador.
+        """
+        tarefa = Tarefa(None, descricao=descricao, timeout=timeout, total=total)
+
+        def consumir():
+            with closing(gerador(*args, **kwargs)) as itens:
+                for item in itens:
+                    if tarefa._cancelada:
+                        break
+                    tarefa.parciais.append(item)
+            return tarefa.parciais
+
+        tarefa._futuro = self._executor.submit(consumir)
+        return tarefa
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+# tests/test_corte.py
+"""Orçamento de corte em lote via IA contra um cliente Groq falso (sem rede)."""
+
+import threading
+import time
+import types
+
+import pandas as pd
+import pytest
+
+import corte
+import ia
+
+
+class ErroApi(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ClienteFalso:
+    """Imita `client.chat.completions.create`; `falhas` são levantadas, em ordem, antes das respostas."""
+
+    def __init__(self, resposta="Custo de máquina: R$ 10.00\nPREÇO UNITÁRIO ESTIMADO: R$ 42.50", falhas=(), latencia=0.0):
+        self.resposta = resposta
+        self.falhas = list(falhas)
+        self.latencia = latencia
+        self.chamadas = 0
+        self._trava = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, messages, model, timeout=None):
+        with self._trava:
+            self.chamadas += 1
+            falha = self.falhas.pop(0) if self.falhas else None
+        if falha is not None:
+            raise falha
+        if self.latencia:
+            time.sleep(self.latencia)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=self.resposta))])
+
+
+def pecas(n, **fixos):
+    colunas = {'Material': 'Aço Carbono', 'Espessura (mm)': 6.35, 'Comprimento de Corte (mm)': 1000, 'Furos': 2, 'Quantidade': 3}
+    colunas.update(fixos)
+    df = pd.DataFrame([colunas] * n)
+    if 'Comprimento de Corte (mm)' not in fixos:
+        df['Comprimento de Corte (mm)'] = range(1000, 1000 + n)
+    return df
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ("PREÇO UNITÁRIO ESTIMADO: R$ 42.50", 42.50),
+    ("PREÇO UNITÁRIO ESTIMADO: R$ 1.234,56", 1234.56),
+    ("Preço unitário estimado: R$ 1,234.56", 1234.56),
+    ("Máquina: R$ 10,00\nConsumíveis: R$ 2.00\nPREÇO UNITÁRIO ESTIMADO: R$ 18.75.", 18.75),
+    ("Total aproximado de R$ 7,90", 7.90),
+    ("Sem preço na resposta", None),
+])
+def test_extrair_preco_unitario(texto, esperado):
+    assert ia.extrair_preco_unitario(texto) == esperado
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_orcar_peca_tenta_de_novo_em_erro_temporario(monkeypatch, status):
+    esperas = []
+    monkeypatch.setattr(corte.time, 'sleep', esperas.append)
+    client = ClienteFalso(falhas=[ErroApi(status), ErroApi(status)])
+    preco, _ = corte.orcar_peca(client, 'Aço Carbono', 6.35, 1000, 2, espera_inicial=1.0)
+    assert preco == 42.50
+    assert client.chamadas == 3
+    # backoff exponencial com jitter: [1, 2) s e depois [2, 4) s
+    assert 1.0 <= esperas[0] < 2.0 and 2.0 <= esperas[1] < 4.0
+
+
+def test_orcar_peca_nao_repete_erro_definitivo(monkeypatch):
+    monkeypatch.setattr(corte.time, 'sleep', lambda s: None)
+    client = ClienteFalso(falhas=[ErroApi(400)])
+    with pytest.raises(ErroApi):
+        corte.orcar_peca(client, 'Aço Carbono', 6.35, 1000, 2)
+    assert client.chamadas == 1
+
+
+def test_orcar_peca_desiste_apos_as_tentativas(monkeypatch):
+    monkeypatch.setattr(corte.time, 'sleep', lambda s: None)
+    client = ClienteFalso(falhas=[ErroApi(429)] * 10)
+    with pytest.raises(ErroApi):
+        corte.orcar_peca(client, 'Aço Carbono', 6.35, 1000, 2, tentativas=3)
+    assert client.chamadas == 3
+
+
+def test_orcar_lote_consulta_uma_vez_pecas_iguais():
+    client = ClienteFalso()
+    lista = pecas(6, **{'Comprimento de Corte (mm)': 1500})
+    resultados = list(corte.orcar_lote(client, lista, requisicoes_por_minuto=None))
+    assert client.chamadas == 1
+    assert sorted(r['Linha'] for r in resultados) == list(range(6))
+    assert all(r['Status'] == 'OK' and r['Total (R$)'] == pytest.approx(42.50 * 3) for r in resultados)
+
+
+def test_orcar_lote_com_cache_nao_espera_o_limitador(tmp_path):
+    cache = ia.CacheRespostas(tmp_path / "cache.sqlite")
+    lista = pecas(4)
+    list(corte.orcar_lote(ClienteFalso(), lista, cache=cache, requisicoes_por_minuto=None))
+    client = ClienteFalso()
+    inicio = time.monotonic()
+    list(corte.orcar_lote(client, lista, cache=cache, requisicoes_por_minuto=1))
+    assert client.chamadas == 0
+    assert time.monotonic() - inicio < 1.0
+
+
+def test_orcar_lote_marca_erro_sem_interromper_o_lote():
+    client = ClienteFalso(falhas=[ErroApi(400)])
+    resultados = list(corte.orcar_lote(client, pecas(3), max_workers=1, requisicoes_por_minuto=None))
+    assert sorted(r['Status'] for r in resultados) == ['Erro: HTTP 400', 'OK', 'OK']
+
+
+def test_fechar_o_gerador_cancela_as_pecas_na_fila():
+    client = ClienteFalso(latencia=0.2)
+    lote = corte.orcar_lote(client, pecas(20), max_workers=2, requisicoes_por_minuto=None)
+    next(lote)
+    inicio = time.monotonic()
+    lote.close()
+    assert time.monotonic() - inicio < 0.2
+    time.sleep(0.5)  # as consultas já em andamento terminam; as da fila não começam
+    assert client.chamadas < 20
+
+
+def test_ler_lista_pecas_com_medidas_da_chapa_inclui_o_material(tmp_path):
+    arquivo = tmp_path / "pecas.csv"
+    arquivo.write_text("Material;Espessura;Comprimento;Furos;Qtd;Largura;Altura\n"
+                       "Aço Carbono A36;10;1000;2;3;500;400\n"
+                       "Aço Carbono A36;10;1000;2;3;;\n", encoding='utf-8')
+    lista = corte.ler_lista_pecas(arquivo)
+    assert lista[corte.COLUNAS_CHAPA].values.tolist() == [[500, 400], [0, 0]]
+    orcamento = corte.orcar_lote_local(lista)
+    custo_material = corte.calcular_custos('Aço Carbono A36', 10, 1000, 2, 500 * 400)['custo_material']
+    assert custo_material == pytest.approx(500 * 400 * 10 * 7.85e-6 * 7.50)
+    diferenca = orcamento['Preço Unitário (R$)'][0] - orcamento['Preço Unitário (R$)'][1]
+    assert diferenca == pytest.approx(custo_material * (1 + corte.MARGEM), abs=0.01)